@@ -0,0 +1,112 @@
+"""Append-only JSON-lines log of classification attempts, written off the hot path.
+
+Callers hand events to AttemptLog.submit(), which only puts them on a bounded
+queue; if the queue is full the event is dropped and counted rather than
+waiting. A background thread drains the queue in batches, serializes them and
+appends each batch with a single write. When the file passes max_bytes it is
+rotated like logging.handlers.RotatingFileHandler: path -> path.1 -> ... ->
+path.<backups>, oldest discarded.
+
+Each line is one event, e.g.
+
+    {"t": 1712345678.9, "learner": "camera", "target": "A", "signs": 0,
+     "hands": [{"handedness": "Right", "confidence": 0.98, "prediction": "A", "feedback": []}]}
+"""
+import json
+import os
+import queue
+import threading
+
+COUNTERS = ("submitted", "dropped", "written", "batches", "rotations", "errors")
+
+
+class AttemptLog:
+    """Bounded queue plus batching writer thread for one log file.
+
+    Counters are updated without a lock, like the server's Metrics.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, backups=5, queue_size=4096, batch_size=256, flush_interval=0.5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.high_water = 0
+        self.file = open(path, "ab")
+        self.size = self.file.tell()
+        self.closed = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="attempt-log", daemon=True)
+        self.thread.start()
+
+    def submit(self, event):
+        """Queue one event; never blocks. Returns False if it was dropped."""
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.counters["dropped"] += 1
+            return False
+        self.counters["submitted"] += 1
+        depth = self.queue.qsize()
+        if depth > self.high_water:
+            self.high_water = depth
+        return True
+
+    def _drain(self):
+        """Block up to flush_interval for the first event, then take what else is queued."""
+        try:
+            batch = [self.queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._drain()
+            if batch:
+                self._write(batch)
+            elif self.closed.is_set():
+                break
+        self.file.close()
+
+    def _write(self, batch):
+        data = "".join(json.dumps(event, separators=(",", ":")) + "\n" for event in batch).encode("utf-8")
+        try:
+            if self.size and self.size + len(data) > self.max_bytes:
+                self._rotate()
+            self.file.write(data)
+            self.file.flush()
+        except OSError:
+            self.counters["errors"] += 1
+            return
+        self.size += len(data)
+        self.counters["written"] += len(batch)
+        self.counters["batches"] += 1
+
+    def _rotate(self):
+        self.file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.file = open(self.path, "ab")
+        self.size = 0
+        self.counters["rotations"] += 1
+
+    def queue_depth(self):
+        return self.queue.qsize()
+
+    def close(self, timeout=5):
+        """Write out everything queued so far and stop the writer thread."""
+        self.closed.set()
+        self.thread.join(timeout)
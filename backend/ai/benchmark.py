@@ -0,0 +1,294 @@
+"""Microbenchmarks and HTTP load test for the feedback server.
+
+Two suites, each writing a JSON report that can be diffed between revisions:
+
+    python benchmark.py micro [--json micro.json]
+    python benchmark.py load [--clients 32] [--duration 10] [--json load.json]
+
+micro times feature extraction, classification and feedback generation on a
+fixed, seeded set of landmark fixtures. load starts the server in a child
+process (synthetic detector, no camera or model needed) unless --url points
+at a running one. It then runs concurrent keep-alive clients that poll
+/feedback and post /target, and reports p50/p95/p99 latency and requests/s.
+
+--compare old.json prints each figure's change against an earlier report of
+the same suite and exits non-zero if any got worse by more than --tolerance,
+so a per-request latency regression fails the run instead of just showing up
+in the numbers.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+import mediapipe_feedback_server as server
+
+FIXTURE_HANDS = 256
+FIXTURE_SEED = 0
+
+
+def landmark_fixtures(count=FIXTURE_HANDS, seed=FIXTURE_SEED):
+    """Seeded (count, 21, 3) hands: the synthetic template with per-joint noise."""
+    rng = np.random.default_rng(seed)
+    template = server.template_hand()
+    return (template + rng.normal(0.0, 0.02, (count,) + template.shape)).astype(np.float32)
+
+
+def time_call(fn, min_time=0.2, repeat=5):
+    """Median seconds per call of fn over repeat runs of at least min_time each."""
+    fn()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeat:
+            break
+        loops *= 2
+    runs = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        runs.append((time.perf_counter() - start) / loops)
+    return float(np.median(runs))
+
+
+def run_micro(min_time=0.2):
+    hands = landmark_fixtures()
+    one = hands[0]
+    features = server.extract_features(hands)
+    one_features = features[0]
+    margins, below, above = server.score_letters(features[:1])
+    temporal = server.TemporalClassifier()
+
+    cases = {
+        "extract_features[1]": (lambda: server.extract_features(one), 1),
+        f"extract_features[{len(hands)}]": (lambda: server.extract_features(hands), len(hands)),
+        "classify_batch[1]": (lambda: server.classify_batch(one_features, "A"), 1),
+        f"classify_batch[{len(hands)}]": (lambda: server.classify_batch(features, "A"), len(hands)),
+        "classify_hands[1]": (lambda: server.classify_hands(one_features, one, "A"), 1),
+        "score_letters[1]": (lambda: server.score_letters(features[:1]), 1),
+        "generate_feedback": (lambda: server.generate_feedback("A", below[0], above[0]), 1),
+        "temporal_push": (lambda: temporal.push(one_features, one, "A"), 1),
+        "publish_feedback": (lambda: server.publish_feedback("A", [], time.time()), 1),
+    }
+    results = {}
+    for name, (fn, items) in cases.items():
+        seconds = time_call(fn, min_time)
+        results[name] = {"us_per_call": seconds * 1e6, "us_per_item": seconds * 1e6 / items}
+    return results
+
+
+def percentiles(latencies):
+    if not latencies:
+        return {}
+    values = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {"p50_ms": values[0], "p95_ms": values[1], "p99_ms": values[2], "max_ms": max(latencies) * 1000}
+
+
+def client(host, port, deadline, target_ratio, seed, results):
+    """One keep-alive client; appends (kind, latency or None on error) tuples to results."""
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    etag = None
+    samples = []
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if rng.random() < target_ratio:
+                kind = "target"
+                body = json.dumps({"target": rng.choice("ABCDEFGHIKLMNOPQRSTUVWXY")})
+                conn.request("POST", "/target", body, {"Content-Type": "application/json"})
+            else:
+                kind = "feedback"
+                conn.request("GET", "/feedback", headers={"If-None-Match": etag} if etag else {})
+            response = conn.getresponse()
+            response.read()
+            if kind == "feedback" and response.status == 200:
+                etag = response.getheader("ETag")
+            ok = response.status in (200, 304)
+        except (OSError, http.client.HTTPException):
+            ok = False
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+        samples.append((kind, time.perf_counter() - start if ok else None))
+    conn.close()
+    results.extend(samples)
+
+
+def start_local_server(port):
+    env = dict(os.environ, ASL_PORT=str(port), ASL_CAMERA="none", ASL_BACKEND="synthetic", ASL_HEADLESS="1")
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mediapipe_feedback_server.py")],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Local server exited during start-up")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/ready")
+            ready = conn.getresponse().status == 200
+            conn.close()
+            if ready:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Local server did not become ready")
+
+
+def run_load(url, clients, duration, target_ratio):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    results = []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=client, args=(host, port, deadline, target_ratio, seed, results))
+        for seed in range(clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    report = {"clients": clients, "duration_s": elapsed, "endpoints": {}}
+    for kind in ("feedback", "target"):
+        latencies = [latency for k, latency in results if k == kind and latency is not None]
+        errors = sum(1 for k, latency in results if k == kind and latency is None)
+        report["endpoints"][kind] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "requests_per_s": len(latencies) / elapsed,
+            **percentiles(latencies),
+        }
+    ok = [latency for _, latency in results if latency is not None]
+    report["total"] = {
+        "requests": len(ok),
+        "errors": len(results) - len(ok),
+        "requests_per_s": len(ok) / elapsed,
+        **percentiles(ok),
+    }
+    return report
+
+
+# (figure, True if higher is better) compared by --compare.
+LOAD_FIGURES = (("requests_per_s", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False))
+
+
+def compare(report, baseline, tolerance):
+    """Print each figure's change against baseline; return the ones worse by more than tolerance."""
+    if report["suite"] != baseline.get("suite"):
+        raise ValueError(f"Can't compare a {report['suite']} report with a {baseline.get('suite')} one")
+    pairs = []
+    if report["suite"] == "micro":
+        for name, result in report["results"].items():
+            if name in baseline["results"]:
+                pairs.append((f"{name} us/call", result["us_per_call"], baseline["results"][name]["us_per_call"], False))
+    else:
+        sections = dict(report["results"]["endpoints"], total=report["results"]["total"])
+        old_sections = dict(baseline["results"]["endpoints"], total=baseline["results"]["total"])
+        for section, stats in sections.items():
+            for figure, higher_is_better in LOAD_FIGURES:
+                old = old_sections.get(section, {}).get(figure)
+                if figure in stats and old:
+                    pairs.append((f"{section} {figure}", stats[figure], old, higher_is_better))
+
+    regressions = []
+    for name, new, old, higher_is_better in pairs:
+        change = (new - old) / old if old else 0.0
+        worse = -change if higher_is_better else change
+        flag = "  REGRESSION" if worse > tolerance else ""
+        print(f"{name:<36} {old:12.3f} -> {new:12.3f} ({change:+.1%}){flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.time(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    micro = commands.add_parser("micro", help="feature extraction and classification microbenchmarks")
+    micro.add_argument("--min-time", type=float, default=0.2, help="seconds spent timing each case")
+    micro.add_argument("--json", help="write the report to this file")
+    micro.add_argument("--compare", help="earlier micro report to compare against")
+    load = commands.add_parser("load", help="concurrent /feedback and /target clients")
+    load.add_argument("--url", help="running server to test; default starts one locally")
+    load.add_argument("--port", type=int, default=5102, help="port for the locally started server")
+    load.add_argument("--clients", type=int, default=32)
+    load.add_argument("--duration", type=float, default=10.0, help="seconds")
+    load.add_argument("--target-ratio", type=float, default=0.05, help="fraction of requests that post /target")
+    load.add_argument("--json", help="write the report to this file")
+    load.add_argument("--compare", help="earlier load report to compare against")
+    for command in (micro, load):
+        command.add_argument("--tolerance", type=float, default=0.2, help="allowed fractional slowdown for --compare")
+    args = parser.parse_args()
+
+    if args.command == "micro":
+        report = {"suite": "micro", "environment": environment(), "results": run_micro(args.min_time)}
+        for name, result in report["results"].items():
+            print(f"{name:<26} {result['us_per_call']:10.2f} us/call {result['us_per_item']:10.3f} us/item")
+    else:
+        process = None
+        url = args.url
+        if url is None:
+            process = start_local_server(args.port)
+            url = f"http://127.0.0.1:{args.port}"
+        try:
+            results = run_load(url, args.clients, args.duration, args.target_ratio)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+        report = {"suite": "load", "url": url, "environment": environment(), "results": results}
+        for name, stats in list(results["endpoints"].items()) + [("total", results["total"])]:
+            if not stats["requests"]:
+                continue
+            print(
+                f"{name:<9} {stats['requests']:>8} req {stats['requests_per_s']:9.1f} req/s "
+                f"p50 {stats['p50_ms']:7.2f} ms  p95 {stats['p95_ms']:7.2f} ms  "
+                f"p99 {stats['p99_ms']:7.2f} ms  errors {stats['errors']}"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print()
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            sys.exit(f"{len(regressions)} figure(s) regressed by more than {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Offline accuracy/throughput evaluation of the letter classifier.
+
+Runs labelled clips through the same landmark, feature and classification path
+as the feedback server. Each clip gets a fresh detector, so tracking state
+never carries over from one clip to the next. Accuracy is reported for the
+published prediction, the TemporalClassifier's stable letter as the server
+shows it, and for the raw per-frame classifier. Clips are laid out one folder
+per letter:
+
+    clips/A/*.mp4
+    clips/B/*.mp4
+
+Usage: python evaluate_videos.py clips [--workers 4] [--stride 1] [--json out.json]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+import mediapipe_feedback_server as server
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+STAGES = ("decode", "convert", "detect", "features", "classify", "temporal")
+
+
+def find_clips(root):
+    clips = []
+    for label in sorted(os.listdir(root)):
+        folder = os.path.join(root, label)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                clips.append((label.upper(), os.path.join(folder, name)))
+    return clips
+
+
+def init_worker():
+    server.load_vision()
+    server.load_exemplars()
+
+
+def evaluate_clip(label, path, stride=1):
+    """Classify every stride-th frame of one clip.
+
+    Returns per-frame and published predictions and stage times.
+    """
+    timings = dict.fromkeys(STAGES, 0.0)
+    points = []
+    hand_frames = []
+    frames = 0
+    rgb = None
+    frame = None
+
+    backend = server.create_backend(server.default_backend_name())
+    cap = cv2.VideoCapture(path)
+    index = 0
+    while True:
+        t0 = time.perf_counter()
+        ret, frame = cap.read(frame)
+        t1 = time.perf_counter()
+        timings["decode"] += t1 - t0
+        if not ret:
+            break
+        index += 1
+        if (index - 1) % stride:
+            continue
+
+        rgb = server.convert_to_rgb(frame, rgb)
+        t2 = time.perf_counter()
+        detections = backend.detect(rgb, int(index * 1000 / 30))
+        t3 = time.perf_counter()
+        timings["convert"] += t2 - t1
+        timings["detect"] += t3 - t2
+
+        if detections:
+            points.append(max(detections, key=lambda d: d.confidence).points)
+            hand_frames.append(frames)
+        frames += 1
+    cap.release()
+    backend.close()
+
+    predictions = ["No hand"] * frames
+    published = ["No hand"] * frames
+    if points:
+        t0 = time.perf_counter()
+        points = np.stack(points)
+        features = server.extract_features(points)
+        t1 = time.perf_counter()
+        results = server.classify_hands(features, points, label)
+        t2 = time.perf_counter()
+        timings["features"] += t1 - t0
+        timings["classify"] += t2 - t1
+        for frame_index, result in zip(hand_frames, results):
+            predictions[frame_index] = result.prediction
+
+        # The server's temporal path: losing the hand resets it, and frames
+        # without a stable letter keep showing the last one published.
+        temporal = server.TemporalClassifier()
+        shown = "Unknown"
+        previous = None
+        for row, frame_index in enumerate(hand_frames):
+            if previous is not None and frame_index != previous + 1:
+                temporal.reset()
+                shown = "Unknown"
+            stable, _ = temporal.push(features[row], points[row], label)
+            if stable is not None:
+                shown = stable
+            published[frame_index] = shown
+            previous = frame_index
+        timings["temporal"] += time.perf_counter() - t2
+
+    return {
+        "label": label,
+        "path": path,
+        "predictions": predictions,
+        "published": published,
+        "timings": timings,
+    }
+
+
+def confusion_matrix(clip_results, key):
+    """Per-label prediction counts and accuracy over each clip's result[key]."""
+    columns = list(server.LETTER_TABLE.letters) + ["Unknown", "No hand"]
+    labels = sorted({r["label"] for r in clip_results})
+    confusion = {label: dict.fromkeys(columns, 0) for label in labels}
+    for result in clip_results:
+        row = confusion[result["label"]]
+        for prediction in result[key]:
+            row[prediction] = row.get(prediction, 0) + 1
+
+    accuracy = {}
+    for label, row in confusion.items():
+        total = sum(row.values())
+        accuracy[label] = row.get(label, 0) / total if total else 0.0
+    return confusion, accuracy
+
+
+def build_report(clip_results, wall_time):
+    timings = dict.fromkeys(STAGES, 0.0)
+    frames = 0
+    for result in clip_results:
+        for stage, seconds in result["timings"].items():
+            timings[stage] += seconds
+        frames += len(result["predictions"])
+
+    confusion, accuracy = confusion_matrix(clip_results, "published")
+    frame_confusion, frame_accuracy = confusion_matrix(clip_results, "predictions")
+
+    return {
+        "clips": len(clip_results),
+        "frames": frames,
+        "wall_time_s": wall_time,
+        "frames_per_second": frames / wall_time if wall_time else 0.0,
+        "stage_ms_per_frame": {
+            stage: 1000 * seconds / frames if frames else 0.0 for stage, seconds in timings.items()
+        },
+        "accuracy": accuracy,
+        "confusion": confusion,
+        "frame_accuracy": frame_accuracy,
+        "frame_confusion": frame_confusion,
+    }
+
+
+def print_report(report):
+    columns = [
+        col
+        for col in list(server.LETTER_TABLE.letters) + ["Unknown", "No hand"]
+        if any(row.get(col) for row in report["confusion"].values())
+    ]
+    print("Published (temporal) predictions; 'frame' is the per-frame classifier's accuracy.")
+    print(f"{'true':>6} " + " ".join(f"{col[:7]:>7}" for col in columns) + f" {'acc':>6} {'frame':>6}")
+    for label, row in report["confusion"].items():
+        cells = " ".join(f"{row.get(col, 0):>7}" for col in columns)
+        print(f"{label:>6} {cells} {report['accuracy'][label]:>6.1%} {report['frame_accuracy'][label]:>6.1%}")
+
+    print()
+    print(f"{report['frames']} frames from {report['clips']} clips in {report['wall_time_s']:.1f}s "
+          f"({report['frames_per_second']:.1f} frames/s)")
+    for stage, ms in report["stage_ms_per_frame"].items():
+        print(f"  {stage:<9} {ms:8.3f} ms/frame")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("clips", help="directory with one sub-folder of clips per letter")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--stride", type=int, default=1, help="evaluate every Nth frame")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.clips):
+        parser.error(f"{args.clips} is not a directory")
+    clips = find_clips(args.clips)
+    if not clips:
+        parser.error(f"no clips found under {args.clips}")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=max(1, args.workers),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+    ) as pool:
+        futures = [pool.submit(evaluate_clip, label, path, args.stride) for label, path in clips]
+        clip_results = [f.result() for f in futures]
+    report = build_report(clip_results, time.perf_counter() - start)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""Nearest-neighbour sign classifier over labelled exemplars.
+
+An exemplar file is an .npz holding labelled vectors of one kind:
+
+    kind        "features" (extract_features output) or "landmarks"
+                (normalize_landmarks output, 63 values per hand)
+    labels      (N,) unicode sign labels
+    vectors     (N, D) float32 exemplars
+    mean, std   (D,) standardization applied before indexing
+    radius      neighbours further than this (standardized units) are ignored
+
+Vectors are indexed in a KD-tree at load time, so a query costs roughly
+log(N) node visits rather than a scan over every exemplar. scipy's cKDTree is
+used when it is installed; otherwise a small numpy KD-tree does the same job.
+
+Build an exemplar file from landmark recordings, labelling every hand frame
+with the target that was active when it was recorded:
+
+    python exemplar_index.py build signs.npz session1.lmk session2.lmk
+    python exemplar_index.py bench signs.npz
+"""
+import argparse
+import time
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+KINDS = ("features", "landmarks")
+LEAF_SIZE = 64
+# Default radius is this multiple of the 99th percentile of each exemplar's
+# distance to its nearest other exemplar.
+RADIUS_SCALE = 1.5
+
+
+def normalize_landmarks(points):
+    """Flatten (21, 3) or (N, 21, 3) landmarks into position- and scale-free vectors.
+
+    The wrist is moved to the origin and the hand scaled so the wrist to middle
+    knuckle distance is 1.
+    """
+    points = np.asarray(points, dtype=np.float32)
+    centered = points - points[..., :1, :]
+    scale = np.linalg.norm(centered[..., 9, :], axis=-1)
+    centered = centered / np.maximum(scale, 1e-6)[..., None, None]
+    return centered.reshape(*points.shape[:-2], -1)
+
+
+class KDTree:
+    """KD-tree style index with k-nearest queries, for when scipy is missing.
+
+    Points are split along their widest dimension down to leaves of at most
+    leaf_size. Rather than walking the tree node by node in Python, a query
+    bounds its distance to every leaf box in one vectorized step and scans
+    leaves nearest-first until the next box is further than the k-th
+    neighbour found so far.
+    """
+
+    def __init__(self, data, leaf_size=LEAF_SIZE):
+        data = np.ascontiguousarray(data, dtype=np.float64)
+        order = np.arange(len(data))
+        starts = []
+        self._split(data, order, 0, len(data), leaf_size, starts)
+        self.order = order
+        self.data = data[order]
+        self.starts = np.array(starts + [len(data)])
+        self.lower = np.array([self.data[a:b].min(axis=0) for a, b in zip(self.starts, self.starts[1:])])
+        self.upper = np.array([self.data[a:b].max(axis=0) for a, b in zip(self.starts, self.starts[1:])])
+        self.norms = (self.data * self.data).sum(axis=1)
+        self.leaf_rows = [np.arange(a, b) for a, b in zip(self.starts, self.starts[1:])]
+
+    def _split(self, data, order, start, stop, leaf_size, starts):
+        if stop - start <= leaf_size:
+            starts.append(start)
+            return
+        block = data[order[start:stop]]
+        dim = int(np.argmax(block.max(axis=0) - block.min(axis=0)))
+        mid = (stop - start) // 2
+        order[start:stop] = order[start:stop][np.argpartition(block[:, dim], mid)]
+        self._split(data, order, start, start + mid, leaf_size, starts)
+        self._split(data, order, start + mid, stop, leaf_size, starts)
+
+    def query(self, points, k=1):
+        """Return (distances, indices) of the k nearest points, nearest first.
+
+        Like cKDTree.query, a (N, D) batch of queries gives (N, k) results.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        if points.ndim == 2:
+            found = [self._query_one(point, k) for point in points]
+            return np.array([d for d, _ in found]), np.array([i for _, i in found])
+        return self._query_one(points, k)
+
+    def _query_one(self, point, k):
+        gap = np.maximum(self.lower - point, 0.0) + np.maximum(point - self.upper, 0.0)
+        bounds = (gap * gap).sum(axis=1)
+
+        best = np.full(k, np.inf)
+        best_index = np.zeros(k, dtype=np.intp)
+        ranked = np.argsort(bounds)
+        # Scan leaves in groups that double in size, so a query that has to
+        # look at many leaves doesn't pay per-leaf overhead for each of them.
+        position, group = 0, 1
+        while position < len(ranked) and bounds[ranked[position]] < best[-1]:
+            leaves = ranked[position:position + group]
+            leaves = leaves[bounds[leaves] < best[-1]]
+            rows = np.concatenate([self.leaf_rows[leaf] for leaf in leaves])
+            distances = self.norms[rows] - 2.0 * (self.data[rows] @ point) + point @ point
+            candidates = np.concatenate([best, np.maximum(distances, 0.0)])
+            keep = np.argpartition(candidates, k - 1)[:k]
+            keep = keep[np.argsort(candidates[keep])]
+            best_index = np.concatenate([best_index, rows])[keep]
+            best = candidates[keep]
+            position += group
+            group *= 2
+
+        found = np.isfinite(best)
+        return np.sqrt(best[found]), self.order[best_index[found]]
+
+
+def build_tree(vectors):
+    return cKDTree(vectors) if cKDTree is not None else KDTree(vectors)
+
+
+def query_tree(tree, vectors, k):
+    """(distances, indices), each (N, k), for an (N, D) batch of queries."""
+    distances, indices = tree.query(vectors, k=k)
+    return np.reshape(distances, (len(vectors), k)), np.reshape(indices, (len(vectors), k))
+
+
+class ExemplarIndex:
+    """Labelled exemplars indexed for k-nearest-neighbour sign lookup."""
+
+    def __init__(self, kind, labels, vectors, mean=None, std=None, radius=None):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown exemplar kind {kind!r}; expected one of {KINDS}")
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(labels) or not len(vectors):
+            raise ValueError("Exemplars need one non-empty (N, D) vector per label")
+        self.kind = kind
+        self.labels = np.asarray(labels, dtype=str)
+        self.vectors = vectors
+        self.mean = vectors.mean(axis=0) if mean is None else np.asarray(mean, dtype=np.float32)
+        std = vectors.std(axis=0) if std is None else np.asarray(std, dtype=np.float32)
+        self.std = np.where(std > 1e-6, std, 1.0).astype(np.float32)
+        self.tree = build_tree((vectors - self.mean) / self.std)
+        self.radius = self.default_radius() if radius is None else float(radius)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                str(data["kind"]),
+                data["labels"],
+                data["vectors"],
+                data["mean"],
+                data["std"],
+                float(data["radius"]),
+            )
+
+    def save(self, path):
+        np.savez(
+            path,
+            kind=self.kind,
+            labels=self.labels,
+            vectors=self.vectors,
+            mean=self.mean,
+            std=self.std,
+            radius=self.radius,
+        )
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def signs(self):
+        return sorted(set(self.labels.tolist()))
+
+    def default_radius(self):
+        if len(self) < 2:
+            return float("inf")
+        standardized = (self.vectors - self.mean) / self.std
+        nearest = query_tree(self.tree, standardized, 2)[0][:, 1]
+        return float(np.percentile(nearest, 99) * RADIUS_SCALE)
+
+    def query_vectors(self, features, points):
+        """(N, D) query vectors of this index's kind for a batch of hands.
+
+        features are extract_features rows and points the (N, 21, 3)
+        landmarks behind them.
+        """
+        if self.kind == "features":
+            return np.atleast_2d(features)
+        return np.atleast_2d(normalize_landmarks(points))
+
+    def _query(self, vectors, k):
+        k = min(k, len(self))
+        return query_tree(self.tree, (np.atleast_2d(vectors) - self.mean) / self.std, k)
+
+    def nearest(self, vector, k=5):
+        """Return [(label, distance), ...] for the k nearest exemplars, nearest first."""
+        distances, indices = self._query(vector, k)
+        return [(str(self.labels[i]), float(d)) for d, i in zip(distances[0], indices[0])]
+
+    def predict_batch(self, vectors, k=5):
+        """predict() for each row of an (N, D) batch, with one tree query for all of them.
+
+        Rows with NaN or infinite values (e.g. from coincident landmarks) are
+        not queried and predict None.
+        """
+        vectors = np.atleast_2d(vectors)
+        finite = np.isfinite(vectors).all(axis=1)
+        predictions = [None] * len(vectors)
+        if not finite.any():
+            return predictions
+        distances, indices = self._query(vectors[finite], k)
+        labels = self.labels[indices]
+        rows = np.flatnonzero(finite)
+        for row, row_labels, row_distances in zip(rows, labels, distances):
+            votes = {}
+            for rank, label in enumerate(row_labels[row_distances <= self.radius].tolist()):
+                count, first = votes.get(label, (0, rank))
+                votes[label] = (count + 1, first)
+            if votes:
+                predictions[row] = max(votes, key=lambda label: (votes[label][0], -votes[label][1]))
+        return predictions
+
+    def predict(self, vector, k=5):
+        """Majority label among the k nearest exemplars within radius, or None.
+
+        Ties go to the label with the nearest exemplar.
+        """
+        return self.predict_batch(vector, k)[0]
+
+
+def build_from_recordings(paths, kind):
+    """Exemplars from every hand frame of the given landmark recordings."""
+    import mediapipe_feedback_server as server
+    from landmark_recording import LandmarkRecording
+
+    labels, vectors = [], []
+    for path in paths:
+        recording = LandmarkRecording(path)
+        rows = np.flatnonzero(recording.present)
+        if not len(rows):
+            continue
+        points = np.asarray(recording.points[rows])
+        if kind == "features":
+            vectors.append(server.extract_features(points).astype(np.float32))
+        else:
+            vectors.append(normalize_landmarks(points))
+        labels.append(np.char.decode(recording.targets[rows], "ascii"))
+    if not vectors:
+        raise ValueError("No hand frames in the given recordings")
+    return ExemplarIndex(kind, np.concatenate(labels), np.concatenate(vectors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build an exemplar file from landmark recordings")
+    build.add_argument("output")
+    build.add_argument("recordings", nargs="+")
+    build.add_argument("--kind", choices=KINDS, default="features")
+    bench = commands.add_parser("bench", help="time k-nearest queries against an exemplar file")
+    bench.add_argument("exemplars")
+    bench.add_argument("-k", type=int, default=5)
+    bench.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = build_from_recordings(args.recordings, args.kind)
+        index.save(args.output)
+        print(f"{len(index)} {index.kind} exemplars of {len(index.signs)} signs, radius {index.radius:.3f}")
+        return
+
+    start = time.perf_counter()
+    index = ExemplarIndex.load(args.exemplars)
+    loaded = time.perf_counter() - start
+    rng = np.random.default_rng(0)
+    queries = index.vectors[rng.integers(len(index), size=args.queries)]
+    queries = queries + rng.normal(0.0, 0.05, queries.shape).astype(np.float32) * index.std
+    start = time.perf_counter()
+    for vector in queries:
+        index.nearest(vector, args.k)
+    per_query = (time.perf_counter() - start) / len(queries)
+    backend = "scipy cKDTree" if cKDTree is not None else "numpy KDTree"
+    print(f"{len(index)} exemplars, {len(index.signs)} signs, loaded in {loaded * 1000:.1f} ms")
+    print(f"{backend}: {per_query * 1e6:.1f} us per {args.k}-nearest query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Turns the stream of stable letter predictions into fingerspelled words.
+
+FingerspellingDecoder is fed one prediction per processed frame. A letter is
+committed once it has been held for COMMIT_SECONDS. Holding it longer does not
+repeat it; a double letter needs the hand to release it (any other prediction,
+including "Unknown", for RELEASE_SECONDS) and sign it again. Frames without a
+stable prediction yet (None) are neutral: they neither commit nor release. Losing the hand
+for WORD_GAP_SECONDS ends the word and appends it to the transcript.
+
+With a lexicon, the decoder keeps a pointer into a prefix trie whose nodes
+hold their top completions, precomputed when the trie is built, so each
+committed letter costs one dictionary lookup however large the word list is.
+
+Word lists have one word per line, optionally followed by a tab and a count
+used to rank completions:
+
+    hello\t1200
+    help\t950
+"""
+import heapq
+from collections import deque
+
+COMMIT_SECONDS = 0.3
+RELEASE_SECONDS = 0.15
+WORD_GAP_SECONDS = 1.0
+TOP_COMPLETIONS = 5
+TRANSCRIPT_WORDS = 50
+
+
+class TrieNode:
+    __slots__ = ("children", "count", "completions")
+
+    def __init__(self):
+        self.children = {}
+        self.count = 0
+        self.completions = ()
+
+
+class LexiconTrie:
+    """Prefix trie of upper-case words with precomputed top completions per node."""
+
+    def __init__(self, words, top=TOP_COMPLETIONS):
+        """words is an iterable of (word, count) pairs."""
+        self.root = TrieNode()
+        self.size = 0
+        for word, count in words:
+            word = word.strip().upper()
+            if not word.isalpha():
+                continue
+            node = self.root
+            for letter in word:
+                node = node.children.setdefault(letter, TrieNode())
+            if not node.count:
+                self.size += 1
+            node.count += max(count, 1)
+        self._rank(self.root, "", top)
+
+    def _rank(self, root, prefix, top):
+        """Fill completions bottom-up without recursion (word lists can be long)."""
+        stack = [(root, prefix, False)]
+        while stack:
+            node, word, children_done = stack.pop()
+            if not children_done:
+                stack.append((node, word, True))
+                stack.extend((child, word + letter, False) for letter, child in node.children.items())
+                continue
+            candidates = [entry for child in node.children.values() for entry in child.completions]
+            if node.count:
+                candidates.append((node.count, word))
+            node.completions = tuple(heapq.nlargest(top, candidates))
+
+    @classmethod
+    def load(cls, path, top=TOP_COMPLETIONS):
+        def entries():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    word, _, count = line.rstrip("\n").partition("\t")
+                    if word:
+                        yield word, int(count) if count.strip().isdigit() else 1
+
+        return cls(entries(), top)
+
+    def __len__(self):
+        return self.size
+
+
+class FingerspellingDecoder:
+    """Incremental letter debouncing and word tracking for one signer."""
+
+    def __init__(self, lexicon=None, commit_seconds=COMMIT_SECONDS, release_seconds=RELEASE_SECONDS,
+                 word_gap_seconds=WORD_GAP_SECONDS):
+        self.lexicon = lexicon
+        self.commit_seconds = commit_seconds
+        self.release_seconds = release_seconds
+        self.word_gap_seconds = word_gap_seconds
+        self.transcript = deque(maxlen=TRANSCRIPT_WORDS)
+        self.word = []
+        self.node = lexicon.root if lexicon is not None else None
+        self.candidate = None
+        self.candidate_since = None
+        self.committed = None
+        self.released_since = None
+        self.hand_lost_at = None
+
+    def feed(self, prediction, timestamp):
+        """Feed one frame's stable prediction.
+
+        prediction is a letter, "Unknown", "No hand", or None while the hand's
+        prediction hasn't settled. Returns True if the word or transcript changed.
+        """
+        if prediction == "No hand":
+            if self.hand_lost_at is None:
+                self.hand_lost_at = timestamp
+            self.candidate = None
+            if timestamp - self.hand_lost_at >= self.word_gap_seconds:
+                self.committed = None
+                return self.end_word()
+            return self._release(timestamp)
+
+        self.hand_lost_at = None
+        if prediction is None:
+            return False
+        letter = prediction if prediction and len(prediction) == 1 and prediction.isalpha() else None
+        if letter is not None and letter == self.committed:
+            # Still (or again) holding the committed letter; a short flicker
+            # away from it doesn't count towards releasing it.
+            self.released_since = None
+        else:
+            self._release(timestamp)
+        if letter is None:
+            self.candidate = None
+            return False
+
+        if letter != self.candidate:
+            self.candidate = letter
+            self.candidate_since = timestamp
+        if letter == self.committed or timestamp - self.candidate_since < self.commit_seconds:
+            return False
+        self._commit(letter)
+        return True
+
+    def _release(self, timestamp):
+        if self.committed is None:
+            return False
+        if self.released_since is None:
+            self.released_since = timestamp
+        elif timestamp - self.released_since >= self.release_seconds:
+            self.committed = None
+            self.released_since = None
+        return False
+
+    def _commit(self, letter):
+        self.committed = letter
+        self.released_since = None
+        self.word.append(letter)
+        if self.node is not None:
+            self.node = self.node.children.get(letter)
+
+    def end_word(self):
+        """Move the current word to the transcript. Returns True if there was one."""
+        if not self.word:
+            return False
+        self.transcript.append("".join(self.word))
+        self.word = []
+        self.node = self.lexicon.root if self.lexicon is not None else None
+        return True
+
+    def completions(self):
+        if self.node is None or not self.word:
+            return []
+        return [word for _, word in self.node.completions]
+
+    def state(self):
+        return {
+            "word": "".join(self.word),
+            "completions": self.completions(),
+            "transcript": " ".join(self.transcript),
+        }
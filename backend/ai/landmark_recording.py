@@ -0,0 +1,207 @@
+"""Compact append-only recording of the hand landmark stream.
+
+A recording is a 64-byte header followed by fixed-size records, one per
+processed frame:
+
+    timestamp  float64      wall-clock time of the frame
+    present    uint8        1 if a hand was detected
+    target     1-byte ASCII active target letter
+    points     float32[21,3] landmarks (zeros when no hand)
+
+Records are written in append mode and a torn last record is ignored on read,
+so a recording survives the server being killed. A sidecar ".idx" file holds
+(record, timestamp) pairs every INDEX_STRIDE records for time-based seeks.
+
+Replay a recording through the classifier without decoding any video:
+
+    python landmark_recording.py session.lmk
+"""
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+MAGIC = b"ASLLMK01"
+VERSION = 1
+HEADER_SIZE = 64
+HEADER_FORMAT = "<8sIIId"
+INDEX_STRIDE = 256
+
+RECORD_DTYPE = np.dtype(
+    {
+        "names": ["timestamp", "present", "target", "points"],
+        "formats": ["<f8", "u1", "S1", ("<f4", (21, 3))],
+        "offsets": [0, 8, 9, 16],
+        "itemsize": 268,
+    }
+)
+INDEX_DTYPE = np.dtype([("record", "<u8"), ("timestamp", "<f8")])
+
+
+def pack_header(created):
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, RECORD_DTYPE.itemsize, 21, created)
+    return header.ljust(HEADER_SIZE, b"\0")
+
+
+def read_header(f):
+    raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        raise ValueError("Truncated landmark recording header")
+    magic, version, record_size, landmarks, created = struct.unpack_from(HEADER_FORMAT, raw)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a landmark recording")
+    if record_size != RECORD_DTYPE.itemsize or landmarks != 21:
+        raise ValueError("Unsupported landmark record layout")
+    return created
+
+
+class RecordingWriter:
+    """Appends landmark records to a recording, creating it if needed."""
+
+    def __init__(self, path):
+        self.path = path
+        self.record = np.zeros(1, dtype=RECORD_DTYPE)
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER_SIZE:
+            with open(path, "rb") as f:
+                read_header(f)
+            size = os.path.getsize(path)
+            self.count = (size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+            # Drop a torn record left by an unclean shutdown before appending.
+            with open(path, "r+b") as f:
+                f.truncate(HEADER_SIZE + self.count * RECORD_DTYPE.itemsize)
+        else:
+            with open(path, "wb") as f:
+                f.write(pack_header(time.time()))
+            with open(path + ".idx", "wb"):
+                pass
+            self.count = 0
+        self.file = open(path, "ab")
+        self.index_file = open(path + ".idx", "ab")
+
+    def write(self, timestamp, points, target):
+        """Append one frame; points is a (21, 3) array or None when no hand is present."""
+        record = self.record[0]
+        record["timestamp"] = timestamp
+        record["target"] = target.encode("ascii", "replace")[:1]
+        if points is None:
+            record["present"] = 0
+            record["points"] = 0.0
+        else:
+            record["present"] = 1
+            record["points"] = points
+        self.file.write(self.record.tobytes())
+
+        if self.count % INDEX_STRIDE == 0:
+            self.index_file.write(np.array([(self.count, timestamp)], dtype=INDEX_DTYPE).tobytes())
+        self.count += 1
+
+    def flush(self):
+        self.file.flush()
+        self.index_file.flush()
+
+    def close(self):
+        self.file.close()
+        self.index_file.close()
+
+
+class LandmarkRecording:
+    """Read-only memory-mapped view of a recording."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.created = read_header(f)
+        count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        if count:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+
+        index_path = path + ".idx"
+        if os.path.exists(index_path) and os.path.getsize(index_path) >= INDEX_DTYPE.itemsize:
+            self.index = np.fromfile(index_path, dtype=INDEX_DTYPE)
+            self.index = self.index[self.index["record"] < count]
+        else:
+            self.index = np.zeros(0, dtype=INDEX_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def timestamps(self):
+        return self.records["timestamp"]
+
+    @property
+    def present(self):
+        return self.records["present"].astype(bool)
+
+    @property
+    def targets(self):
+        return self.records["target"]
+
+    @property
+    def points(self):
+        return self.records["points"]
+
+    def find_time(self, timestamp):
+        """Index of the first record at or after timestamp."""
+        start, stop = 0, len(self.records)
+        if len(self.index):
+            block = np.searchsorted(self.index["timestamp"], timestamp, side="right") - 1
+            if block >= 0:
+                start = int(self.index["record"][block])
+            if block + 1 < len(self.index):
+                stop = int(self.index["record"][block + 1])
+        return start + int(np.searchsorted(self.timestamps[start:stop], timestamp))
+
+
+def replay(recording, table=None):
+    """Classify every hand frame in a recording, one batch per target letter.
+
+    Returns {target: {prediction: count}}.
+    """
+    import mediapipe_feedback_server as server
+
+    table = table or server.LETTER_TABLE
+    present = recording.present
+    targets = recording.targets
+    summary = {}
+
+    for target in np.unique(targets):
+        letter = target.decode("ascii")
+        rows = np.flatnonzero(present & (targets == target))
+        counts = {"No hand": int(np.count_nonzero(~present & (targets == target)))}
+        if len(rows):
+            points = recording.points[rows]
+            features = server.extract_features(points)
+            for result in server.classify_hands(features, points, letter, table):
+                counts[result.prediction] = counts.get(result.prediction, 0) + 1
+        summary[letter] = counts
+    return summary
+
+
+def main(argv):
+    if len(argv) != 2:
+        print(f"usage: {argv[0]} RECORDING")
+        return 2
+
+    import mediapipe_feedback_server  # noqa: F401 -- keep import time out of the measurement
+
+    recording = LandmarkRecording(argv[1])
+    start = time.perf_counter()
+    summary = replay(recording)
+    elapsed = time.perf_counter() - start
+
+    for target, counts in summary.items():
+        total = sum(counts.values())
+        correct = counts.get(target, 0)
+        ranked = sorted(counts.items(), key=lambda item: -item[1])
+        detail = ", ".join(f"{prediction}={count}" for prediction, count in ranked)
+        print(f"{target}: {correct}/{total} correct ({detail})")
+    print(f"{len(recording)} records replayed in {elapsed * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,44 +1,139 @@
-import sys
-print("PYTHON EXEC:", sys.executable)
+import bisect
+import hashlib
+import itertools
 import json
+import multiprocessing
 import os
+import queue
+import re
+import tempfile
 import threading
 import time
 import urllib.request
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import zipfile
+from collections import deque, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
 
-import cv2
 import numpy as np
-import mediapipe as mp
 
-USE_TASKS_API = not hasattr(mp, "solutions")
-if USE_TASKS_API:
-    from mediapipe.tasks import python as mp_tasks
-    from mediapipe.tasks.python import vision as mp_vision
-    from mediapipe.tasks.python.vision.core.image import Image, ImageFormat
-
-    mp_drawing = mp_vision.drawing_utils
-    mp_drawing_styles = mp_vision.drawing_styles
-else:
-    mp_drawing = mp.solutions.drawing_utils
-    mp_hands = mp.solutions.hands
-
-
-
-
-def get_angle(a, b, c):
-    ba = a - b
-    bc = c - b
-    cos = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
-    return np.degrees(np.arccos(cos))
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+from attempt_log import AttemptLog
+from exemplar_index import ExemplarIndex
+from fingerspelling import FingerspellingDecoder, LexiconTrie
+from landmark_recording import RecordingWriter
+
+# OpenCV and MediaPipe take seconds to import, so they are loaded by
+# load_vision() after the HTTP server is already accepting connections.
+cv2 = None
+mp = None
+USE_TASKS_API = None
+mp_tasks = mp_vision = Image = ImageFormat = None
+mp_drawing = mp_drawing_styles = mp_hands = None
+vision_lock = threading.Lock()
+
+
+def load_vision():
+    """Import OpenCV and MediaPipe on first call; later calls return immediately."""
+    global cv2, mp, USE_TASKS_API, mp_tasks, mp_vision, Image, ImageFormat
+    global mp_drawing, mp_drawing_styles, mp_hands
+
+    with vision_lock:
+        if cv2 is not None:
+            return
 
+        import cv2 as cv2_module
+        import mediapipe as mp_module
+
+        mp = mp_module
+        USE_TASKS_API = not hasattr(mp, "solutions")
+        if USE_TASKS_API:
+            from mediapipe.tasks import python as mp_tasks
+            from mediapipe.tasks.python import vision as mp_vision
+            from mediapipe.tasks.python.vision.core.image import Image, ImageFormat
+
+            mp_drawing = mp_vision.drawing_utils
+            mp_drawing_styles = mp_vision.drawing_styles
+        else:
+            mp_drawing = mp.solutions.drawing_utils
+            mp_hands = mp.solutions.hands
+        cv2 = cv2_module
+
+
+NUM_LANDMARKS = 21
+
+FEATURE_NAMES = (
+    "index",
+    "middle",
+    "ring",
+    "pinky",
+    "thumb",
+    "im_dist",
+    "ti_dist",
+    "tm_dist",
+    "tp_dist",
+    "tr_dist",
+    "thumb_dx",
+    "index_dx",
+    "index_dy",
+)
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+NUM_FEATURES = len(FEATURE_NAMES)
+
+# (base, joint, tip) landmark triples for the index, middle, ring and pinky angles.
+FINGER_JOINTS = np.array([[5, 6, 8], [9, 10, 12], [13, 14, 16], [17, 18, 20]])
+# Landmark pairs for thumb, im_dist, ti_dist, tm_dist, tp_dist and tr_dist.
+DISTANCE_PAIRS = np.array([[4, 5], [12, 8], [4, 8], [4, 12], [4, 20], [4, 16]])
+
+
+def landmarks_to_array(landmarks, out=None):
+    """Copy MediaPipe landmarks into a (21, 3) float32 array."""
+    if out is None:
+        out = np.empty((NUM_LANDMARKS, 3), dtype=np.float32)
+    for i, lm in enumerate(landmarks):
+        out[i, 0] = lm.x
+        out[i, 1] = lm.y
+        out[i, 2] = lm.z
+    return out
+
+
+def extract_features(landmarks):
+    """Compute the classifier features for a (21, 3) or (N, 21, 3) landmark array.
+
+    Returns a (NUM_FEATURES,) or (N, NUM_FEATURES) float64 array ordered as
+    FEATURE_NAMES. Angles are truncated to whole degrees and distances rounded
+    to 3 decimals, matching the thresholds in letter_ranges.
+    """
+    pts = np.asarray(landmarks, dtype=np.float64)
+    single = pts.ndim == 2
+    if single:
+        pts = pts[np.newaxis]
+
+    joints = pts[:, FINGER_JOINTS]
+    ba = joints[:, :, 0] - joints[:, :, 1]
+    bc = joints[:, :, 2] - joints[:, :, 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos = np.einsum("nfk,nfk->nf", ba, bc) / (
+            np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1)
+        )
+    angles = np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
 
-def get_distance(p1, p2):
-    return np.linalg.norm(p1 - p2)
+    pairs = pts[:, DISTANCE_PAIRS]
+    distances = np.linalg.norm(pairs[:, :, 0] - pairs[:, :, 1], axis=-1)
 
+    features = np.empty((pts.shape[0], NUM_FEATURES))
+    features[:, 0:4] = np.trunc(angles)
+    features[:, 4:10] = np.round(distances, 3)
+    features[:, 10] = np.round(pts[:, 4, 0] - pts[:, 5, 0], 3)
+    features[:, 11:13] = pts[:, 8, :2] - pts[:, 5, :2]
 
-def in_range(val, low, high):
-    return low <= val <= high
+    return features[0] if single else features
 
 
 letter_ranges = {
@@ -255,364 +350,2331 @@ FEEDBACK_MAP = {
 }
 
 
-def generate_feedback(target_letter, angles):
-    if target_letter not in letter_ranges:
+# Penalty added to a letter's margin when its "dir" constraint fails.
+DIRECTION_PENALTY = 1.0
+
+LetterTable = namedtuple(
+    "LetterTable",
+    [
+        "letters",
+        "index",
+        "lower",
+        "upper",
+        "width",
+        "used",
+        "horizontal",
+        "vertical",
+        "columns",
+        "low_messages",
+        "high_messages",
+        "version",
+    ],
+)
+
+Classification = namedtuple("Classification", ["prediction", "ranking", "feedback"])
+
+
+def compile_letter_ranges(ranges, feedback_map, version=0):
+    """Compile letter_ranges into dense (letters x features) bound matrices.
+
+    Bounds a letter doesn't use are NaN. columns[i] keeps the feature order of
+    the letter's definition so feedback messages come out in the same order.
+    """
+    letters = tuple(ranges)
+    lower = np.full((len(letters), NUM_FEATURES), np.nan)
+    upper = np.full((len(letters), NUM_FEATURES), np.nan)
+    horizontal = np.zeros(len(letters), dtype=bool)
+    vertical = np.zeros(len(letters), dtype=bool)
+    columns = []
+
+    for i, letter in enumerate(letters):
+        order = []
+        for name, bounds in ranges[letter].items():
+            if name == "dir":
+                horizontal[i] = bounds == "horizontal"
+                vertical[i] = bounds == "vertical"
+                continue
+            if name not in FEATURE_INDEX:
+                raise ValueError(f"Unknown feature {name!r} for letter {letter!r}")
+            col = FEATURE_INDEX[name]
+            lower[i, col], upper[i, col] = bounds
+            order.append(col)
+        columns.append(np.array(order, dtype=np.intp))
+
+    used = ~np.isnan(lower)
+    width = np.where(used, upper - lower, 1.0)
+    width = np.maximum(width, 1e-6)
+
+    low_messages = tuple(feedback_map.get(name, {}).get("low") for name in FEATURE_NAMES)
+    high_messages = tuple(feedback_map.get(name, {}).get("high") for name in FEATURE_NAMES)
+
+    return LetterTable(
+        letters=letters,
+        index={letter: i for i, letter in enumerate(letters)},
+        lower=lower,
+        upper=upper,
+        width=width,
+        used=used,
+        horizontal=horizontal,
+        vertical=vertical,
+        columns=tuple(columns),
+        low_messages=low_messages,
+        high_messages=high_messages,
+        version=version,
+    )
+
+
+# The active table. Reloads build a new table and rebind this name, so readers
+# (which fetch it once per call) never see a half-updated one and never wait.
+LETTER_TABLE = compile_letter_ranges(letter_ranges, FEEDBACK_MAP)
+signs_lock = threading.Lock()
+signs_state = {
+    "version": 0,
+    "path": None,
+    "loaded_at": time.time(),
+    "error": None,
+    "letters": letter_ranges,
+    "feedback": FEEDBACK_MAP,
+}
+
+
+def parse_sign_definitions(data):
+    """Validate a sign-definition document; returns (ranges, feedback_map).
+
+    The document has "letters" mapping each sign to {feature: [low, high]}
+    plus an optional "dir" of "horizontal" or "vertical", and an optional
+    "feedback" mapping features to {"low": msg, "high": msg} that replaces
+    FEEDBACK_MAP.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("letters"), dict) or not data["letters"]:
+        raise ValueError('Sign definitions need a non-empty "letters" table')
+
+    ranges = {}
+    for letter, spec in data["letters"].items():
+        if not isinstance(spec, dict) or not spec:
+            raise ValueError(f"Sign {letter!r} needs at least one feature range")
+        ranges[letter] = {}
+        for name, bounds in spec.items():
+            if name == "dir":
+                if bounds not in ("horizontal", "vertical"):
+                    raise ValueError(f'Sign {letter!r} has dir {bounds!r}; expected "horizontal" or "vertical"')
+                ranges[letter][name] = bounds
+                continue
+            if name not in FEATURE_INDEX:
+                raise ValueError(f"Unknown feature {name!r} for sign {letter!r}")
+            if (
+                not isinstance(bounds, (list, tuple))
+                or len(bounds) != 2
+                or not all(isinstance(b, (int, float)) and not isinstance(b, bool) for b in bounds)
+                # json.loads accepts NaN and Infinity; a NaN bound would
+                # compile to an unused feature and silently drop the range.
+                or not np.isfinite(bounds).all()
+                or bounds[0] > bounds[1]
+            ):
+                raise ValueError(
+                    f"Range {name!r} of sign {letter!r} must be [low, high] finite numbers with low <= high"
+                )
+            ranges[letter][name] = (bounds[0], bounds[1])
+
+    feedback_map = data.get("feedback", FEEDBACK_MAP)
+    if not isinstance(feedback_map, dict):
+        raise ValueError('"feedback" must map features to {"low": ..., "high": ...}')
+    for name, messages in feedback_map.items():
+        if name not in FEATURE_INDEX:
+            raise ValueError(f"Feedback for unknown feature {name!r}")
+        if not isinstance(messages, dict) or not set(messages) <= {"low", "high"}:
+            raise ValueError(f'Feedback for {name!r} must be {{"low": ..., "high": ...}}')
+        if not all(isinstance(message, str) and message for message in messages.values()):
+            raise ValueError(f"Feedback messages for {name!r} must be non-empty strings")
+    return ranges, feedback_map
+
+
+def read_sign_definitions(path):
+    with open(path, "rb") as f:
+        raw = f.read()
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise ValueError("TOML sign definitions need Python 3.11+")
+        return tomllib.loads(raw.decode("utf-8"))
+    return json.loads(raw)
+
+
+def reload_sign_definitions(path=None):
+    """Load, validate and compile sign definitions, then swap them in.
+
+    On any error the current table stays active, the error is kept in
+    signs_state and re-raised as ValueError.
+    """
+    global LETTER_TABLE
+    path = path or SIGNS_PATH
+    with signs_lock:
+        try:
+            ranges, feedback_map = parse_sign_definitions(read_sign_definitions(path))
+            table = compile_letter_ranges(ranges, feedback_map, signs_state["version"] + 1)
+        except (OSError, ValueError, UnicodeDecodeError) as exc:
+            signs_state["error"] = f"{path}: {exc}"
+            raise ValueError(signs_state["error"]) from exc
+        LETTER_TABLE = table
+        signs_state.update(
+            version=table.version,
+            path=path,
+            loaded_at=time.time(),
+            error=None,
+            letters=ranges,
+            feedback=feedback_map,
+        )
+    return table
+
+
+def watch_sign_definitions(path=None, interval=None):
+    """Reload the sign definitions whenever the file changes. Runs forever."""
+    path = path or SIGNS_PATH
+    interval = interval or SIGNS_POLL_SECONDS
+    last = None
+    while True:
+        try:
+            stat = os.stat(path)
+            current = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            current = None
+        if current is not None and last is not None and current != last:
+            try:
+                table = reload_sign_definitions(path)
+                print(f"Reloaded sign definitions v{table.version} ({len(table.letters)} signs)")
+            except ValueError as exc:
+                print(f"Keeping sign definitions v{LETTER_TABLE.version}: {exc}")
+        last = current
+        time.sleep(interval)
+
+
+def score_letters(features, table=None):
+    """Score an (N, NUM_FEATURES) batch against every letter in one pass.
+
+    Returns (margins, below, above): margins is (N, letters), the sum of each
+    letter's range violations normalized by range width (0 means a match);
+    below/above are the raw (N, letters, features) violations.
+    """
+    if table is None:
+        table = LETTER_TABLE
+    x = features[:, np.newaxis, :]
+    below = np.where(table.lower > x, table.lower - x, 0.0)
+    above = np.where(table.upper < x, x - table.upper, 0.0)
+
+    margins = ((below + above) / table.width).sum(axis=-1)
+    margins[(np.isnan(x) & table.used).any(axis=-1)] = np.inf
+
+    dx = np.abs(features[:, FEATURE_INDEX["index_dx"]])
+    dy = np.abs(features[:, FEATURE_INDEX["index_dy"]])
+    margins += np.outer(dx < dy, table.horizontal) * DIRECTION_PENALTY
+    margins += np.outer(dx > dy, table.vertical) * DIRECTION_PENALTY
+
+    return margins, below, above
+
+
+def generate_feedback(target_letter, below, above, table=None):
+    """Return (param, "low"/"high") pairs for one frame's violations of target_letter."""
+    if table is None:
+        table = LETTER_TABLE
+    row = table.index.get(target_letter)
+    if row is None:
         return []
 
-    expected = letter_ranges[target_letter]
     feedback = []
+    for col in table.columns[row]:
+        if below[row, col] > 0:
+            feedback.append((FEATURE_NAMES[col], "low"))
+        elif above[row, col] > 0:
+            feedback.append((FEATURE_NAMES[col], "high"))
+    return feedback
 
-    for param, (low, high) in expected.items():
-        if param not in angles:
-            continue
 
-        val = angles[param]
-        if val < low:
-            feedback.append((param, "low"))
-        elif val > high:
-            feedback.append((param, "high"))
+def classify_batch(features, target, table=None):
+    """Classify an (N, NUM_FEATURES) batch; returns one Classification per row.
+
+    ranking lists every letter with its margin, best first. Ties keep
+    letter_ranges order, so the prediction is the first letter that matches.
+    table defaults to the active LETTER_TABLE, read once for the whole batch.
+    """
+    if table is None:
+        table = LETTER_TABLE
+    features = np.atleast_2d(features)
+    margins, below, above = score_letters(features, table)
+    order = np.argsort(margins, axis=1, kind="stable")
+
+    results = []
+    for n in range(features.shape[0]):
+        ranking = [(table.letters[i], float(margins[n, i])) for i in order[n]]
+        best_letter, best_margin = ranking[0]
+        prediction = best_letter if best_margin == 0 else "Unknown"
+
+        feedback_msgs = []
+        for param, kind in generate_feedback(target, below[n], above[n], table):
+            messages = table.low_messages if kind == "low" else table.high_messages
+            msg = messages[FEATURE_INDEX[param]]
+            if msg:
+                feedback_msgs.append(msg)
+
+        results.append(Classification(prediction, ranking, feedback_msgs))
+    return results
+
+
+# Optional nearest-neighbour index (ASL_EXEMPLARS); loaded by load_exemplars().
+exemplars = None
+
+
+def load_exemplars(path=None):
+    global exemplars
+    path = path or EXEMPLARS_PATH
+    if path:
+        exemplars = ExemplarIndex.load(path)
+    return exemplars
+
+
+def classify_hands(features, points, target, table=None):
+    """classify_batch, with predictions taken from the exemplar index when one is loaded.
+
+    points are the (N, 21, 3) landmarks behind features. Rows with no
+    exemplar within the index radius keep the interval classifier's result;
+    feedback always comes from the interval table.
+    """
+    results = classify_batch(features, target, table)
+    index = exemplars
+    if index is None:
+        return results
+    labels = index.predict_batch(index.query_vectors(features, points), EXEMPLAR_K)
+    for i, label in enumerate(labels):
+        if label is not None:
+            results[i] = results[i]._replace(prediction=label)
+    return results
+
+
+# Temporal classification: frames kept for motion letters, frames median-smoothed
+# before classifying, and how many of the last VOTE_FRAMES per-frame labels must
+# agree before a prediction is published.
+WINDOW_FRAMES = 30
+SMOOTHING_FRAMES = 5
+VOTE_FRAMES = 7
+VOTE_MIN = 5
+
+# Motion letters, traced by a fingertip over the window. Travel thresholds are
+# in units of hand size (wrist to middle-finger MCP).
+MOTION_MIN_FRAMES = 10
+J_MIN_DROP = 0.4
+J_MIN_HOOK = 0.2
+Z_MIN_STROKE = 0.3
+Z_MIN_DROP = 0.2
+
+
+def count_strokes(values, min_travel):
+    """Count back-and-forth strokes of at least min_travel in a 1-D path."""
+    strokes = 0
+    direction = 0
+    extreme = values[0]
+    for v in values[1:]:
+        if direction == 0:
+            if abs(v - values[0]) >= min_travel:
+                direction = 1 if v > values[0] else -1
+                extreme = v
+                strokes = 1
+        elif direction * (v - extreme) > 0:
+            extreme = v
+        elif abs(v - extreme) >= min_travel:
+            direction = -direction
+            extreme = v
+            strokes += 1
+    return strokes
+
+
+def detect_motion_letter(points, features):
+    """Recognise J or Z from an (n, 21, 3) landmark window, oldest frame first.
+
+    J: pinky extended, others curled, pinky tip drops then hooks sideways.
+    Z: index extended, others curled, index tip zig-zags left/right while moving down.
+    """
+    if len(points) < MOTION_MIN_FRAMES:
+        return None
+    scale = np.median(np.linalg.norm(points[:, 9, :2] - points[:, 0, :2], axis=1))
+    if not scale > 0:
+        return None
+
+    angles = np.median(features[:, 0:4], axis=0)
+    index, middle, ring, pinky = angles
+    curled = lambda angle: angle < 110
+
+    if pinky >= 150 and curled(index) and curled(middle) and curled(ring):
+        path = points[:, 20, :2] / scale
+        tail = path[-max(3, len(path) // 3):]
+        drop = path[:, 1].max() - path[0, 1]
+        hook = tail[-1] - tail[0]
+        if drop >= J_MIN_DROP and abs(hook[0]) >= J_MIN_HOOK and abs(hook[0]) > abs(hook[1]):
+            return "J"
+
+    if index >= 150 and curled(middle) and curled(ring) and curled(pinky):
+        path = points[:, 8, :2] / scale
+        if count_strokes(path[:, 0], Z_MIN_STROKE) >= 3 and path[-1, 1] - path[0, 1] >= Z_MIN_DROP:
+            return "Z"
+
+    return None
+
+
+class TemporalClassifier:
+    """Sliding-window classifier over per-frame features.
+
+    Frames go into fixed ring buffers. Each frame is classified on the median
+    of the last SMOOTHING_FRAMES feature vectors, and a letter is reported as
+    stable once it wins VOTE_MIN of the last VOTE_FRAMES frames. The full
+    window of landmarks is also checked for the motion letters J and Z.
+    """
+
+    def __init__(self, window=WINDOW_FRAMES):
+        self.window = window
+        self.features = np.empty((window, NUM_FEATURES))
+        self.points = np.empty((window, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.votes = np.empty(window, dtype=object)
+        self.count = 0
+        self.head = 0
+
+    def reset(self):
+        self.count = 0
+        self.head = 0
+
+    def _recent(self, buffer, n):
+        n = min(n, self.count)
+        idx = (self.head - n + np.arange(n)) % self.window
+        return buffer[idx]
+
+    def push(self, features, points, target):
+        """Add one frame; returns (stable prediction or None, feedback for target)."""
+        self.features[self.head] = features
+        self.points[self.head] = points
+        self.head = (self.head + 1) % self.window
+        self.count = min(self.count + 1, self.window)
+
+        smoothed = np.median(self._recent(self.features, SMOOTHING_FRAMES), axis=0)
+        result = classify_hands(smoothed, points, target)[0]
+        self.votes[(self.head - 1) % self.window] = result.prediction
+
+        motion = detect_motion_letter(
+            self._recent(self.points, self.window), self._recent(self.features, self.window)
+        )
+        if motion is not None:
+            self.reset()
+            return motion, result.feedback
 
-    return feedback
+        votes = list(self._recent(self.votes, VOTE_FRAMES))
+        winner = max(set(votes), key=votes.count)
+        if votes.count(winner) >= VOTE_MIN:
+            return winner, result.feedback
+        return None, result.feedback
 
 
 MODEL_URL = "https://storage.googleapis.com/mediapipe-assets/hand_landmarker.task"
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "models", "hand_landmarker.task")
+MODEL_CHECKSUM_PATH = MODEL_PATH + ".sha256"
+# Optional pinned checksum; without it the model is checked structurally.
+MODEL_SHA256 = os.environ.get("ASL_MODEL_SHA256", "").lower()
+
+# "video" runs detect_for_video inline; "live_stream" uses detect_async with a
+# result callback (Tasks API only). Only consulted when ASL_BACKEND is "auto".
+RUNNING_MODE = os.environ.get("ASL_RUNNING_MODE", "video").lower()
+
+# Sign definitions (JSON, or TOML on Python 3.11+) replacing letter_ranges and
+# FEEDBACK_MAP. The file is polled and hot-swapped when it changes; POST
+# /signs/reload forces a reload. ASL_ADMIN_TOKEN, if set, is required as a
+# bearer token on that endpoint.
+SIGNS_PATH = os.environ.get("ASL_SIGNS")
+SIGNS_POLL_SECONDS = 1.0
+ADMIN_TOKEN = os.environ.get("ASL_ADMIN_TOKEN")
+
+# Exemplar file (see exemplar_index.py) for nearest-neighbour classification,
+# and how many neighbours vote. Without one only letter_ranges is used.
+EXEMPLARS_PATH = os.environ.get("ASL_EXEMPLARS")
+EXEMPLAR_K = int(os.environ.get("ASL_EXEMPLAR_K", "5"))
+
+# Word list for the fingerspelling decoder's completions (see fingerspelling.py).
+LEXICON_PATH = os.environ.get("ASL_LEXICON")
+
+# Hands tracked per frame (1 or 2). Each hand is classified separately and
+# reported under "hands" in the feedback payload.
+NUM_HANDS = min(2, max(1, int(os.environ.get("ASL_NUM_HANDS", "1"))))
+
+# Detector backend for the camera loop: auto, tasks_video, tasks_live_stream,
+# legacy, or the camera-less synthetic / replay (ASL_REPLAY recording).
+# tasks_image and legacy_image don't track between frames; they serve posted
+# session frames and detector processes.
+BACKEND = os.environ.get("ASL_BACKEND", "auto").lower()
+REPLAY_PATH = os.environ.get("ASL_REPLAY")
+# Rate the camera-less backends are driven at; 0 runs them unthrottled.
+SYNTHETIC_FPS = float(os.environ.get("ASL_SYNTHETIC_FPS", "30"))
+
+# Skip drawing and the preview window (and its waitKey delay) in production.
+HEADLESS = os.environ.get("ASL_HEADLESS", "0") == "1"
+
+# Crop camera frames to a padded box around the last hand and scale the
+# inference input to keep the loop within ROI_FRAME_BUDGET seconds.
+ROI_TRACKING = os.environ.get("ASL_ROI", "1") == "1"
+ROI_PADDING = 0.6
+ROI_MARGIN = 0.1
+INFERENCE_SIZES = (640, 480, 384, 320, 256)
+ROI_FRAME_BUDGET = 1 / 30
+ROI_ADAPT_COOLDOWN = 30
+
+# A hand whose landmarks moved less than this fraction of its size (wrist to
+# middle knuckle) since it was last classified reuses that classification.
+# 0 disables the motion gate.
+MOTION_TOLERANCE = float(os.environ.get("ASL_MOTION_TOLERANCE", "0.03"))
+
+# Idle mode: after ASL_IDLE_AFTER seconds without a hand, only ASL_IDLE_FPS
+# frames per second are decoded (the rest are grabbed and discarded) and they
+# are downscaled to IDLE_INFERENCE_SIZE for a presence check. 0 disables it.
+IDLE_AFTER = float(os.environ.get("ASL_IDLE_AFTER", "3"))
+IDLE_FPS = float(os.environ.get("ASL_IDLE_FPS", "4"))
+IDLE_INFERENCE_SIZE = 256
+
+# Append the camera loop's raw landmark stream to this file (see landmark_recording.py).
+RECORD_PATH = os.environ.get("ASL_RECORD")
+
+# Local camera index, or "none" to only serve frames posted by clients.
+CAMERA_SOURCE = os.environ.get("ASL_CAMERA", "0")
+
+# Upper bound on landmarker instances (and decode threads) for posted frames.
+LANDMARKER_POOL_SIZE = int(os.environ.get("ASL_LANDMARKER_POOL", "2"))
+
+# Detector processes fed from a shared-memory frame ring. 0 keeps detection in
+# this process; otherwise both the camera loop (with ASL_BACKEND=auto) and
+# posted frames are detected in that many child processes.
+DETECTOR_PROCESSES = int(os.environ.get("ASL_DETECTOR_PROCESSES", "0"))
+# Largest frame a ring slot holds, in pixels; two slots per process.
+FRAME_SLOT_PIXELS = int(os.environ.get("ASL_FRAME_SLOT_PIXELS", str(1280 * 720)))
+SESSION_TTL = 300
+MAX_FRAME_BYTES = 8 * 1024 * 1024
+# Largest batch accepted by POST /classify.
+MAX_CLASSIFY_HANDS = 4096
+
+HTTP_PORT = int(os.environ.get("ASL_PORT", "5002"))
+
+# JSON-lines log of classifications: each change of the camera's published
+# result and every posted session frame. Written in batches by a background
+# thread and rotated at ATTEMPT_LOG_MAX_BYTES.
+ATTEMPT_LOG_PATH = os.environ.get("ASL_ATTEMPT_LOG")
+ATTEMPT_LOG_MAX_BYTES = int(os.environ.get("ASL_ATTEMPT_LOG_MAX_BYTES", str(64 * 1024 * 1024)))
+ATTEMPT_LOG_BACKUPS = 5
+ATTEMPT_QUEUE_SIZE = 4096
+
+# Events kept for /feedback/stream clients resuming with Last-Event-ID.
+FEEDBACK_HISTORY = 256
+STREAM_KEEPALIVE = 15
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_valid_model(path):
+    """A .task bundle is a zip archive; a truncated download fails this check."""
+    if not zipfile.is_zipfile(path):
+        return False
+    with zipfile.ZipFile(path) as bundle:
+        return bundle.testzip() is None
+
+
+def verify_model_file(path):
+    """Check the model against MODEL_SHA256 (or its zip structure if unpinned).
+
+    The result is cached next to the model keyed on size and mtime, so later
+    starts skip re-hashing an unchanged file.
+    """
+    stat = os.stat(path)
+    key = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    try:
+        with open(MODEL_CHECKSUM_PATH) as f:
+            cached = json.load(f)
+        if {k: cached.get(k) for k in key} == key and (
+            not MODEL_SHA256 or cached.get("sha256") == MODEL_SHA256
+        ):
+            return True
+    except (OSError, ValueError):
+        pass
+
+    sha256 = file_sha256(path)
+    if MODEL_SHA256:
+        if sha256 != MODEL_SHA256:
+            return False
+    elif not is_valid_model(path):
+        return False
+
+    with open(MODEL_CHECKSUM_PATH, "w") as f:
+        json.dump(dict(key, sha256=sha256), f)
+    return True
+
+
+def download_model():
+    """Download into a temp file and rename it into place only once verified."""
+    model_dir = os.path.dirname(MODEL_PATH)
+    fd, tmp_path = tempfile.mkstemp(dir=model_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out, urllib.request.urlopen(MODEL_URL, timeout=60) as response:
+            expected = int(response.headers.get("Content-Length") or 0)
+            size = 0
+            for chunk in iter(lambda: response.read(1 << 20), b""):
+                out.write(chunk)
+                size += len(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+        if expected and size != expected:
+            raise OSError(f"Model download truncated ({size} of {expected} bytes)")
+        if MODEL_SHA256 and file_sha256(tmp_path) != MODEL_SHA256:
+            raise OSError("Downloaded model checksum mismatch")
+        if not is_valid_model(tmp_path):
+            raise OSError("Downloaded model is not a valid task bundle")
+        os.replace(tmp_path, MODEL_PATH)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+model_lock = threading.Lock()
 
 
 def ensure_hand_landmarker_model():
-    if os.path.exists(MODEL_PATH):
-        return
+    with model_lock:
+        if os.path.exists(MODEL_PATH) and verify_model_file(MODEL_PATH):
+            return
 
-    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-    print("Downloading MediaPipe hand landmarker model...")
-    urllib.request.urlretrieve(MODEL_URL, MODEL_PATH)
+        os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
+        print("Downloading MediaPipe hand landmarker model...")
+        download_model()
+        if not verify_model_file(MODEL_PATH):
+            raise RuntimeError("Hand landmarker model failed verification")
+
+
+def create_hand_landmarker(running_mode, result_callback=None):
+    ensure_hand_landmarker_model()
+    base_options = mp_tasks.BaseOptions(model_asset_path=MODEL_PATH)
+    mode_options = {"running_mode": running_mode}
+    if result_callback is not None:
+        mode_options["result_callback"] = result_callback
+    options = mp_vision.HandLandmarkerOptions(
+        base_options=base_options,
+        num_hands=NUM_HANDS,
+        min_hand_detection_confidence=0.1,
+        min_hand_presence_confidence=0.1,
+        min_tracking_confidence=0.1,
+        **mode_options,
+    )
+    return mp_vision.HandLandmarker.create_from_options(options)
+
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# "detect" is inference time only; "detect_latency" is frame capture or
+# submission to result for backends that queue frames (live stream, processes).
+STAGES = ("capture", "convert", "detect", "detect_latency", "draw", "features", "classify", "feedback_lock")
+FRAME_COUNTERS = ("captured", "dropped", "processed", "with_hand", "classified", "idle", "skipped")
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and two additions."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Metrics:
+    """Per-stage latency histograms, frame counters and the processed frame rate.
+
+    Updates take no lock: each stage is written by one thread and a scrape that
+    races an update is at most one observation off.
+    """
+
+    def __init__(self):
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self.frames = dict.fromkeys(FRAME_COUNTERS, 0)
+        self.frame_rate = 0.0
+        self.last_frame = None
+        self.idle = False
+
+    def observe(self, stage, seconds):
+        self.stages[stage].observe(seconds)
+
+    def count(self, counter, n=1):
+        self.frames[counter] += n
+
+    def frame_processed(self):
+        now = time.monotonic()
+        if self.last_frame is not None and now > self.last_frame:
+            self.frame_rate += 0.1 * (1.0 / (now - self.last_frame) - self.frame_rate)
+        self.last_frame = now
+        self.frames["processed"] += 1
+
+    def render(self):
+        """Prometheus text exposition format."""
+        lines = [
+            "# HELP asl_stage_seconds Time spent in each processing stage.",
+            "# TYPE asl_stage_seconds histogram",
+        ]
+        for stage, hist in self.stages.items():
+            cumulative = 0
+            for bound, count in zip(hist.buckets, hist.counts):
+                cumulative += count
+                lines.append(f'asl_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            cumulative += hist.counts[-1]
+            lines.append(f'asl_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {cumulative}')
+            lines.append(f'asl_stage_seconds_sum{{stage="{stage}"}} {hist.sum}')
+            lines.append(f'asl_stage_seconds_count{{stage="{stage}"}} {cumulative}')
+
+        lines.append("# HELP asl_frames_total Camera frames by outcome.")
+        lines.append("# TYPE asl_frames_total counter")
+        for counter, value in self.frames.items():
+            lines.append(f'asl_frames_total{{kind="{counter}"}} {value}')
+
+        lines.append("# HELP asl_frame_rate Processed frames per second (smoothed).")
+        lines.append("# TYPE asl_frame_rate gauge")
+        lines.append(f"asl_frame_rate {self.frame_rate:.3f}")
+
+        lines.append("# HELP asl_idle 1 while the camera loop is in idle (presence check) mode.")
+        lines.append("# TYPE asl_idle gauge")
+        lines.append(f"asl_idle {int(self.idle)}")
+
+        if attempt_log is not None:
+            lines.append("# HELP asl_attempt_log_events_total Attempt log events by outcome.")
+            lines.append("# TYPE asl_attempt_log_events_total counter")
+            for counter, value in attempt_log.counters.items():
+                lines.append(f'asl_attempt_log_events_total{{kind="{counter}"}} {value}')
+            lines.append("# HELP asl_attempt_log_queue_depth Events waiting to be written.")
+            lines.append("# TYPE asl_attempt_log_queue_depth gauge")
+            lines.append(f"asl_attempt_log_queue_depth {attempt_log.queue_depth()}")
+            lines.append("# HELP asl_attempt_log_queue_high_water Most events ever waiting to be written.")
+            lines.append("# TYPE asl_attempt_log_queue_high_water gauge")
+            lines.append(f"asl_attempt_log_queue_high_water {attempt_log.high_water}")
+
+        lines.append("# HELP asl_sign_table_version Version of the active sign definitions.")
+        lines.append("# TYPE asl_sign_table_version gauge")
+        lines.append(f"asl_sign_table_version {LETTER_TABLE.version}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
 
 
 feedback_lock = threading.Lock()
+feedback_changed = threading.Condition(feedback_lock)
 latest_feedback = {
     "prediction": "Waiting...",
     "feedback": [],
     "target": "A",
+    "hands": [],
+    "spelling": {"word": "", "completions": [], "transcript": ""},
     "timestamp": time.time(),
+    "sequence": 0,
 }
+FeedbackSnapshot = namedtuple("FeedbackSnapshot", ["sequence", "body", "etag"])
+
+# Sequences restart with the process, so ETags and event ids carry an instance id too.
+SERVER_INSTANCE = f"{os.getpid():x}-{int(time.time()):x}"
+
+
+def make_feedback_snapshot():
+    """Encode latest_feedback once. Caller holds feedback_lock."""
+    sequence = latest_feedback["sequence"]
+    body = json.dumps(latest_feedback).encode("utf-8")
+    return FeedbackSnapshot(sequence, body, f'"{SERVER_INSTANCE}-{sequence}"')
+
+
+# Replaced wholesale on every change, so GET /feedback reads it without the lock.
+feedback_snapshot = make_feedback_snapshot()
+feedback_history = deque(maxlen=FEEDBACK_HISTORY)
 target_letter = "A"
 
 
+def record_feedback_event():
+    """Bump the sequence, publish a new snapshot and wake stream clients.
+
+    Caller holds feedback_lock.
+    """
+    global feedback_snapshot
+    latest_feedback["sequence"] += 1
+    feedback_snapshot = make_feedback_snapshot()
+    feedback_history.append(feedback_snapshot)
+    feedback_changed.notify_all()
+
+
+def parse_event_id(value):
+    """Map a client's last event id to a sequence in this process, or -1.
+
+    Ids from another server instance, malformed ones and ones ahead of the
+    current sequence all mean the client should get the current snapshot.
+    """
+    instance, _, sequence = str(value or "").rpartition("-")
+    if instance != SERVER_INSTANCE or not sequence.isdigit():
+        return -1
+    sequence = int(sequence)
+    return sequence if sequence <= feedback_snapshot.sequence else -1
+
+
+def pending_feedback_events(last_sequence):
+    """Return the snapshots published after last_sequence. Caller holds feedback_lock.
+
+    If the client is too far behind for the history to cover the gap, it gets
+    the current snapshot as a single event instead.
+    """
+    if feedback_snapshot.sequence <= last_sequence:
+        return []
+    if not feedback_history or feedback_history[0].sequence > last_sequence + 1:
+        return [feedback_snapshot]
+    return [event for event in feedback_history if event.sequence > last_sequence]
+
+
+def parse_target(value):
+    target = str(value or "").strip().upper()
+    if len(target) == 1 and target.isalpha():
+        return target
+    return None
+
+
+def decode_frame(body, content_type, width=None, height=None):
+    """Decode a posted frame into a contiguous RGB uint8 array.
+
+    JPEG/PNG bodies are decoded with OpenCV; application/octet-stream bodies
+    are raw RGB24 and need width and height.
+    """
+    if content_type in ("image/jpeg", "image/png"):
+        bgr = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if bgr is None:
+            raise ValueError("Could not decode image")
+        return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+
+    if content_type == "application/octet-stream":
+        if not width or not height:
+            raise ValueError("Raw RGB frames need width and height")
+        if len(body) != width * height * 3:
+            raise ValueError("Raw RGB frame size does not match width x height x 3")
+        return np.frombuffer(body, dtype=np.uint8).reshape(height, width, 3).copy()
+
+    raise ValueError(f"Unsupported content type {content_type!r}")
+
+
+def decode_landmarks(body, content_type):
+    """Decode a POST /classify body into (points, target or None).
+
+    application/octet-stream bodies are packed little-endian float32 hands,
+    21 x (x, y, z) each. JSON bodies are {"target": ..., "landmarks": ...}
+    where landmarks is one hand or a list of hands, each 21 [x, y, z] lists
+    or 21 {"x", "y", "z"} objects as MediaPipe's JS API returns them.
+    """
+    hand_bytes = NUM_LANDMARKS * 3 * 4
+    if content_type == "application/octet-stream":
+        if not body or len(body) % hand_bytes:
+            raise ValueError(f"Binary landmark batches must be a multiple of {hand_bytes} bytes")
+        points, target = np.frombuffer(body, dtype="<f4").reshape(-1, NUM_LANDMARKS, 3), None
+    elif content_type in ("application/json", ""):
+        try:
+            data = json.loads(body.decode("utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+            raise ValueError("Invalid JSON body") from exc
+        if not isinstance(data, dict) or not isinstance(data.get("landmarks"), list):
+            raise ValueError('JSON body needs a "landmarks" list')
+        hands = data["landmarks"]
+        # A single hand is a list of landmarks rather than a list of hands.
+        first = hands[0] if hands else None
+        if isinstance(first, dict) or isinstance(first, list) and first and isinstance(first[0], (int, float)):
+            hands = [hands]
+        try:
+            points = np.array(
+                [[(lm["x"], lm["y"], lm.get("z", 0.0)) if isinstance(lm, dict) else lm for lm in hand] for hand in hands],
+                dtype=np.float32,
+            )
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError("Landmarks must be numbers or {x, y, z} objects") from exc
+        if points.ndim != 3 or points.shape[1:] != (NUM_LANDMARKS, 3):
+            raise ValueError(f"Each hand needs {NUM_LANDMARKS} landmarks of (x, y, z)")
+        target = data.get("target")
+    else:
+        raise ValueError(f"Unsupported content type {content_type!r}")
+
+    if not len(points):
+        raise ValueError("No hands to classify")
+    if len(points) > MAX_CLASSIFY_HANDS:
+        raise ValueError(f"At most {MAX_CLASSIFY_HANDS} hands per request")
+    if not np.isfinite(points).all():
+        raise ValueError("Landmarks must be finite")
+    return points, target
+
+
+class Session:
+    """Per-learner state for frames posted to /sessions/{id}/frame."""
+
+    def __init__(self, session_id):
+        self.id = session_id
+        self.target = "A"
+        self.last_seen = time.monotonic()
+
+
+sessions = {}
+sessions_lock = threading.Lock()
+
+
+def get_session(session_id):
+    now = time.monotonic()
+    with sessions_lock:
+        session = sessions.get(session_id)
+        if session is None:
+            for stale_id in [k for k, s in sessions.items() if now - s.last_seen > SESSION_TTL]:
+                del sessions[stale_id]
+            session = sessions[session_id] = Session(session_id)
+        session.last_seen = now
+    return session
+
+
+Detection = namedtuple("Detection", ["points", "handedness", "confidence", "landmarks"])
+Detection.__doc__ = """One detected hand.
+
+points is a (21, 3) float32 array in the coordinates of the image that was
+passed in, handedness "Left" or "Right" with its confidence score, and
+landmarks the backend's raw landmark object (used only for drawing; None for
+camera-less backends).
+"""
+
+WARM_UP_FRAME = np.zeros((256, 256, 3), dtype=np.uint8)
+
+
+class DetectorBackend:
+    """Turns RGB frames into a tuple of up to NUM_HANDS Detections.
+
+    Synchronous backends implement detect(); submit() runs it and hands the
+    result to the on_result callback together with the caller's context.
+    Asynchronous backends override submit() and call on_result later.
+    """
+
+    name = None
+    needs_camera = True
+
+    def __init__(self):
+        self.on_result = None
+
+    def start(self, on_result):
+        self.on_result = on_result
+        return self
+
+    def detect(self, rgb, timestamp_ms):
+        raise NotImplementedError
+
+    def submit(self, rgb, timestamp_ms, context=None):
+        start = time.perf_counter()
+        detections = self.detect(rgb, timestamp_ms)
+        metrics.observe("detect", time.perf_counter() - start)
+        self.on_result(detections, context)
+
+    def frame_buffer(self, shape):
+        """An RGB array the next submit() can take without copying, or None to use your own."""
+        return None
+
+    def warm_up(self):
+        """Run one blank frame so the first real frame doesn't pay for graph setup."""
+        self.detect(WARM_UP_FRAME, int(time.monotonic() * 1000))
+
+    def draw(self, frame, detection, transform=None):
+        pass
+
+    def close(self):
+        pass
+
+
+def tasks_detections(result):
+    detections = []
+    for landmarks, handedness in zip(result.hand_landmarks, result.handedness):
+        category = handedness[0]
+        detections.append(Detection(landmarks_to_array(landmarks), category.category_name, category.score, landmarks))
+    return tuple(detections)
+
+
+class TasksBackend(DetectorBackend):
+    def draw(self, frame, detection, transform=None):
+        if transform is not None:
+            map_landmarks(detection.landmarks, transform)
+        mp_drawing.draw_landmarks(
+            frame,
+            detection.landmarks,
+            mp_vision.HandLandmarksConnections,
+            mp_drawing_styles.get_default_hand_landmarks_style(),
+            mp_drawing_styles.get_default_hand_connections_style(),
+        )
+
+    def close(self):
+        self.landmarker.close()
+
+
+class TasksVideoBackend(TasksBackend):
+    """Tasks API HandLandmarker in VIDEO mode, with its own increasing timestamps."""
+
+    name = "tasks_video"
+
+    def __init__(self):
+        super().__init__()
+        self.landmarker = create_hand_landmarker(mp_vision.RunningMode.VIDEO)
+        self.last_timestamp_ms = -1
+
+    def detect(self, rgb, timestamp_ms):
+        timestamp_ms = max(timestamp_ms, self.last_timestamp_ms + 1)
+        self.last_timestamp_ms = timestamp_ms
+        mp_image = Image(image_format=ImageFormat.SRGB, data=rgb)
+        return tasks_detections(self.landmarker.detect_for_video(mp_image, timestamp_ms))
+
+
+class TasksImageBackend(TasksBackend):
+    """Tasks API HandLandmarker in IMAGE mode: every frame is detected from scratch.
+
+    Nothing carries over between frames, so frames from unrelated sources
+    (different learners, or whichever frames a detector process is handed)
+    can share one instance.
+    """
+
+    name = "tasks_image"
+
+    def __init__(self):
+        super().__init__()
+        self.landmarker = create_hand_landmarker(mp_vision.RunningMode.IMAGE)
+
+    def detect(self, rgb, timestamp_ms):
+        return tasks_detections(self.landmarker.detect(Image(image_format=ImageFormat.SRGB, data=rgb)))
+
+
+class TasksLiveStreamBackend(TasksBackend):
+    """Tasks API HandLandmarker in LIVE_STREAM mode; results arrive on a callback.
+
+    MediaPipe drops frames submitted while the previous one is still running.
+    """
+
+    name = "tasks_live_stream"
+
+    def __init__(self):
+        super().__init__()
+        self.landmarker = create_hand_landmarker(mp_vision.RunningMode.LIVE_STREAM, self._on_async_result)
+        # (timestamp, context) in submission order. The camera thread appends
+        # and only the result callback pops, so no lock is needed.
+        self.contexts = deque()
+        self.last_timestamp_ms = -1
+        self.warm_up_timestamp = None
+
+    def submit(self, rgb, timestamp_ms, context=None):
+        timestamp_ms = max(timestamp_ms, self.last_timestamp_ms + 1)
+        self.last_timestamp_ms = timestamp_ms
+        self.contexts.append((timestamp_ms, context))
+        self.landmarker.detect_async(Image(image_format=ImageFormat.SRGB, data=rgb), timestamp_ms)
+
+    def _on_async_result(self, result, output_image, timestamp_ms):
+        if timestamp_ms == self.warm_up_timestamp:
+            return
+        # Frames MediaPipe dropped never get a result; discard their contexts.
+        while self.contexts and self.contexts[0][0] < timestamp_ms:
+            self.contexts.popleft()
+        context = None
+        if self.contexts and self.contexts[0][0] == timestamp_ms:
+            context = self.contexts.popleft()[1]
+        # MediaPipe doesn't report its inference time here, only the result.
+        metrics.observe("detect_latency", time.monotonic() - timestamp_ms / 1000)
+        self.on_result(tasks_detections(result), context)
+
+    def warm_up(self):
+        self.warm_up_timestamp = int(time.monotonic() * 1000)
+        self.last_timestamp_ms = self.warm_up_timestamp
+        self.landmarker.detect_async(
+            Image(image_format=ImageFormat.SRGB, data=WARM_UP_FRAME), self.warm_up_timestamp
+        )
+
+
+class LegacyHandsBackend(DetectorBackend):
+    """mp.solutions.hands, for MediaPipe builds that still ship it."""
+
+    name = "legacy"
+    static_image_mode = False
+
+    def __init__(self):
+        super().__init__()
+        self.hands = mp_hands.Hands(
+            static_image_mode=self.static_image_mode,
+            min_detection_confidence=0.8,
+            min_tracking_confidence=0.5,
+            max_num_hands=NUM_HANDS,
+        )
+
+    def detect(self, rgb, timestamp_ms):
+        rgb.flags.writeable = False
+        results = self.hands.process(rgb)
+        rgb.flags.writeable = True
+        if not results.multi_hand_landmarks:
+            return ()
+        detections = []
+        for hand, handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
+            category = handedness.classification[0]
+            detections.append(Detection(landmarks_to_array(hand.landmark), category.label, category.score, hand))
+        return tuple(detections)
+
+    def draw(self, frame, detection, transform=None):
+        if transform is not None:
+            map_landmarks(detection.landmarks.landmark, transform)
+        mp_drawing.draw_landmarks(
+            frame,
+            detection.landmarks,
+            mp_hands.HAND_CONNECTIONS,
+            mp_drawing.DrawingSpec(color=(25, 25, 255), circle_radius=2, thickness=2),
+            mp_drawing.DrawingSpec(color=(0, 255, 0)),
+        )
+
+    def close(self):
+        self.hands.close()
+
+
+class LegacyImageBackend(LegacyHandsBackend):
+    """LegacyHandsBackend in static image mode, the legacy counterpart of tasks_image."""
+
+    name = "legacy_image"
+    static_image_mode = True
+
+
+def template_hand():
+    """A flat open hand in normalized image coordinates, wrist at the bottom."""
+    points = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+    points[0] = (0.5, 0.8, 0.0)
+    points[1:5] = [(0.44, 0.74, 0), (0.40, 0.68, 0), (0.37, 0.63, 0), (0.35, 0.59, 0)]
+    for finger, x in enumerate((0.45, 0.5, 0.55, 0.6)):
+        base = 5 + 4 * finger
+        points[base:base + 4] = [(x, 0.62 - 0.06 * j, 0) for j in range(4)]
+    return points
+
+
+class SyntheticBackend(DetectorBackend):
+    """Jittered template hand, mirrored for a second hand; needs no camera or model."""
+
+    name = "synthetic"
+    needs_camera = False
+
+    def __init__(self, jitter=0.003, seed=0):
+        super().__init__()
+        right = template_hand()
+        left = right.copy()
+        left[:, 0] = 1.0 - left[:, 0]
+        self.template = np.stack([right, left])[:NUM_HANDS]
+        self.jitter = jitter
+        self.rng = np.random.default_rng(seed)
+
+    def detect(self, rgb, timestamp_ms):
+        points = self.template + self.rng.normal(0.0, self.jitter, self.template.shape).astype(np.float32)
+        return tuple(
+            Detection(hand, handedness, 1.0, None) for hand, handedness in zip(points, ("Right", "Left"))
+        )
+
+    def warm_up(self):
+        pass
+
+
+class ReplayBackend(DetectorBackend):
+    """Plays back a landmark recording (see landmark_recording.py), looping at the end.
+
+    Recordings hold one hand per frame, reported as "Right".
+    """
+
+    name = "replay"
+    needs_camera = False
+
+    def __init__(self, path=None):
+        super().__init__()
+        from landmark_recording import LandmarkRecording
+
+        path = path or REPLAY_PATH
+        if not path:
+            raise ValueError("The replay backend needs ASL_REPLAY set to a recording")
+        self.recording = LandmarkRecording(path)
+        if not len(self.recording):
+            raise ValueError(f"Recording {path} is empty")
+        self.position = 0
+
+    def detect(self, rgb, timestamp_ms):
+        record = self.recording.records[self.position]
+        self.position = (self.position + 1) % len(self.recording)
+        if not record["present"]:
+            return ()
+        return (Detection(np.array(record["points"], dtype=np.float32), "Right", 1.0, None),)
+
+    def warm_up(self):
+        pass
+
+
+class FrameRing:
+    """Fixed-size RGB frame slots in shared memory, passed between processes by index.
+
+    The owning process creates the segment and hands out free slots; other
+    processes attach by name and read frames in place.
+    """
+
+    def __init__(self, slots, slot_bytes, name=None):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=slots * slot_bytes)
+        self.frames = np.ndarray((slots, slot_bytes), dtype=np.uint8, buffer=self.shm.buf)
+        self.free = queue.Queue()
+        if self.owner:
+            for slot in range(slots):
+                self.free.put(slot)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def view(self, slot, shape):
+        size = shape[0] * shape[1] * shape[2]
+        if size > self.slot_bytes:
+            raise ValueError(f"Frame of {shape[1]}x{shape[0]} does not fit a {self.slot_bytes}-byte ring slot")
+        return self.frames[slot, :size].reshape(shape)
+
+    def acquire(self, block=True):
+        """A free slot index, or None if none is free and block is False."""
+        try:
+            return self.free.get(block=block)
+        except queue.Empty:
+            return None
+
+    def release(self, slot):
+        self.free.put(slot)
+
+    def close(self):
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def detector_process(ring_name, slots, slot_bytes, backend_name, tasks, results):
+    """Child process body for ProcessBackend: detect frames named by tasks until None."""
+    ring = FrameRing(slots, slot_bytes, ring_name)
+    backend = create_backend(backend_name)
+    backend.warm_up()
+    results.put(None)
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        slot, sequence, timestamp_ms, shape = task
+        start = time.perf_counter()
+        try:
+            detections = backend.detect(ring.view(slot, shape), timestamp_ms)
+            hands = [(d.points, d.handedness, float(d.confidence)) for d in detections]
+        except Exception:
+            hands = None
+        results.put((slot, sequence, hands, time.perf_counter() - start))
+    backend.close()
+    ring.close()
+
+
+class ProcessBackend(DetectorBackend):
+    """Runs a synchronous backend in child processes fed from a FrameRing.
+
+    Frames are written once into a shared-memory slot (directly by the camera
+    loop via frame_buffer()) and detectors read them in place; only slot
+    indices and landmark arrays cross process boundaries. Streamed results are
+    delivered in order by a collector thread, dropping any that arrive after a
+    newer frame's. detect() may be called from several threads at once, which
+    is how posted session frames use it. Detections carry no raw landmarks, so
+    the preview shows no skeleton.
+
+    Children run an image-mode backend by default: each frame goes to
+    whichever child is free, and camera and session frames share them, so
+    no child sees one continuous stream to track.
+    """
+
+    name = "processes"
+
+    def __init__(self, workers=None, inner=None, slot_pixels=FRAME_SLOT_PIXELS):
+        super().__init__()
+        workers = max(1, workers or DETECTOR_PROCESSES or 1)
+        inner = inner or image_backend_name()
+        self.ring = FrameRing(2 * workers, slot_pixels * 3)
+        context = multiprocessing.get_context("spawn")
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        self.processes = [
+            context.Process(
+                target=detector_process,
+                args=(self.ring.name, self.ring.slots, self.ring.slot_bytes, inner, self.tasks, self.results),
+                daemon=True,
+            )
+            for _ in range(workers)
+        ]
+        for process in self.processes:
+            process.start()
+
+        self.sequence = itertools.count()
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        self.delivered = -1
+        self.started = 0
+        self.ready = threading.Event()
+        self.reserved = None
+        self.collector = threading.Thread(target=self._collect, name="detector-results", daemon=True)
+        self.collector.start()
+
+    def frame_buffer(self, shape):
+        """Reserve a ring slot for the next submit() and return it as an RGB array, or None."""
+        if self.reserved is None:
+            self.reserved = self.ring.acquire(block=False)
+        if self.reserved is None:
+            return None
+        try:
+            return self.ring.view(self.reserved, shape)
+        except ValueError:
+            # Larger than a slot; submit() will drop it.
+            return None
+
+    def _send(self, slot, rgb, timestamp_ms, waiter):
+        try:
+            view = self.ring.view(slot, rgb.shape)
+        except ValueError:
+            self.ring.release(slot)
+            raise
+        if not np.may_share_memory(view, rgb):
+            view[:] = rgb
+        with self.pending_lock:
+            sequence = next(self.sequence)
+            self.pending[sequence] = (waiter, time.perf_counter())
+        self.tasks.put((slot, sequence, timestamp_ms, rgb.shape))
+
+    def submit(self, rgb, timestamp_ms, context=None):
+        slot, self.reserved = self.reserved, None
+        if slot is None:
+            slot = self.ring.acquire(block=False)
+        if slot is None:
+            # Every slot is still being detected; drop the frame like FrameCapture would.
+            metrics.count("dropped")
+            return
+        try:
+            self._send(slot, rgb, timestamp_ms, context)
+        except ValueError:
+            # Larger than a slot (see ASL_FRAME_SLOT_PIXELS); keep the camera loop going.
+            metrics.count("dropped")
+
+    def detect(self, rgb, timestamp_ms):
+        future = Future()
+        self._send(self.ring.acquire(), rgb, timestamp_ms, future)
+        return future.result()
+
+    def _collect(self):
+        while True:
+            message = self.results.get()
+            if message is None:
+                self.started += 1
+                if self.started == len(self.processes):
+                    self.ready.set()
+                continue
+            if message == "closed":
+                return
+
+            slot, sequence, hands, detect_seconds = message
+            self.ring.release(slot)
+            with self.pending_lock:
+                waiter, submitted = self.pending.pop(sequence)
+            detections = None
+            if hands is not None:
+                detections = tuple(Detection(points, handedness, confidence, None)
+                                   for points, handedness, confidence in hands)
+
+            if isinstance(waiter, Future):
+                if detections is None:
+                    waiter.set_exception(RuntimeError("Hand detection failed in a detector process"))
+                else:
+                    waiter.set_result(detections)
+                continue
+            if detections is None or sequence < self.delivered:
+                continue
+            self.delivered = sequence
+            metrics.observe("detect", detect_seconds)
+            metrics.observe("detect_latency", time.perf_counter() - submitted)
+            self.on_result(detections, waiter)
+
+    def warm_up(self):
+        """Wait until every detector process has loaded and warmed up its backend."""
+        while not self.ready.wait(1.0):
+            if not all(process.is_alive() for process in self.processes):
+                raise RuntimeError("A detector process exited during start-up")
+
+    def close(self):
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+        self.results.put("closed")
+        self.collector.join()
+        self.ring.close()
+
+
+BACKENDS = {
+    cls.name: cls
+    for cls in (
+        TasksVideoBackend,
+        TasksImageBackend,
+        TasksLiveStreamBackend,
+        LegacyHandsBackend,
+        LegacyImageBackend,
+        SyntheticBackend,
+        ReplayBackend,
+        ProcessBackend,
+    )
+}
+
+
+def default_backend_name(live_stream=False):
+    load_vision()
+    if not USE_TASKS_API:
+        return "legacy"
+    return "tasks_live_stream" if live_stream else "tasks_video"
+
+
+def image_backend_name():
+    """The backend for frames that don't form one stream, e.g. different learners'."""
+    load_vision()
+    return "tasks_image" if USE_TASKS_API else "legacy_image"
+
+
+def create_backend(name):
+    if name == "auto" and DETECTOR_PROCESSES > 0:
+        name = "processes"
+    elif name == "auto":
+        name = default_backend_name(RUNNING_MODE == "live_stream")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown detector backend {name!r}; expected one of {sorted(BACKENDS)}")
+    if BACKENDS[name].needs_camera:
+        load_vision()
+    return BACKENDS[name]()
+
+
+class LandmarkerPool:
+    """Decodes and classifies posted frames on a bounded set of workers.
+
+    Workers are created on demand up to size; a request that finds them all
+    busy waits for one to be returned. They run in image mode, because
+    consecutive frames on a worker can come from different learners and must
+    not be tracked from one to the next. With ASL_DETECTOR_PROCESSES set, every
+    thread shares one ProcessBackend instead, so detection for concurrent
+    sessions runs on that many cores. When the camera loop already runs one,
+    it is passed in as processes rather than starting a second set.
+    """
+
+    def __init__(self, size, processes=None):
+        # Decoding needs cv2 even when the camera backend is camera-less.
+        load_vision()
+        self.size = max(1, size)
+        self.idle = queue.Queue()
+        self.created = 0
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="frame-worker")
+        self.processes = processes
+
+    def _acquire(self):
+        if self.processes is not None:
+            return self.processes
+        if DETECTOR_PROCESSES > 0:
+            with self.lock:
+                if self.processes is None:
+                    self.processes = create_backend("processes")
+            return self.processes
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if self.created < self.size:
+                worker = create_backend(image_backend_name())
+                self.created += 1
+                return worker
+        return self.idle.get()
+
+    def _release(self, worker):
+        if worker is not self.processes:
+            self.idle.put(worker)
+
+    def _process(self, session, body, content_type, width, height):
+        rgb = decode_frame(body, content_type, width, height)
+        worker = self._acquire()
+        try:
+            detections = worker.detect(rgb, int(time.monotonic() * 1000))
+        finally:
+            self._release(worker)
+
+        payload = {"session": session.id, "target": session.target, "timestamp": time.time()}
+        if not detections:
+            payload.update(prediction="No hand", feedback=[], hands=[])
+            return payload
+
+        points = np.stack([d.points for d in detections])
+        features = extract_features(points)
+        hands = [
+            hand_result(detection, result.prediction, result.feedback)
+            for detection, result in zip(detections, classify_hands(features, points, session.target))
+        ]
+        primary = primary_hand(hands, session.target)
+        payload.update(prediction=primary["prediction"], feedback=primary["feedback"], hands=hands)
+        record_attempt(session.id, session.target, hands, payload["timestamp"])
+        return payload
+
+    def process(self, session, body, content_type, width=None, height=None):
+        return self.executor.submit(self._process, session, body, content_type, width, height).result()
+
+    def warm_up(self):
+        """Create one worker and run a blank frame through it."""
+        worker = self._acquire()
+        try:
+            worker.warm_up()
+        finally:
+            self._release(worker)
+
+
+landmarker_pool = None
+landmarker_pool_lock = threading.Lock()
+
+# Startup progress reported by /ready; ready is set after the warm-up inference.
+ready = threading.Event()
+startup_state = {"stage": "starting", "error": None}
+
+
+def set_startup_stage(stage, error=None):
+    startup_state["stage"] = stage
+    startup_state["error"] = str(error) if error is not None else None
+    if stage == "ready":
+        ready.set()
+
+
+def get_landmarker_pool(processes=None):
+    """The shared LandmarkerPool; processes is a running ProcessBackend for it to use."""
+    global landmarker_pool
+    with landmarker_pool_lock:
+        if landmarker_pool is None:
+            landmarker_pool = LandmarkerPool(max(LANDMARKER_POOL_SIZE, 2 * DETECTOR_PROCESSES), processes)
+        elif processes is not None:
+            landmarker_pool.processes = processes
+    return landmarker_pool
+
+
+SESSION_PATH = re.compile(r"^/sessions/([A-Za-z0-9_-]{1,64})/(frame|target)$")
+
+
 class FeedbackHandler(BaseHTTPRequestHandler):
-    def _set_headers(self, status_code=200):
+    # Keep-alive; every response must therefore carry a Content-Length.
+    protocol_version = "HTTP/1.1"
+    # Buffer the response so headers and body leave in one send, flushed by
+    # handle_one_request; split sends on a keep-alive connection stall on
+    # Nagle plus delayed ACK.
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def _set_headers(self, status_code=200, content_length=0, extra_headers=(), content_type="application/json"):
         self.send_response(status_code)
-        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(content_length))
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type, If-None-Match")
+        self.send_header("Access-Control-Expose-Headers", "ETag")
+        for name, value in extra_headers:
+            self.send_header(name, value)
         self.end_headers()
 
+    def _send_body(self, body, status_code=200, extra_headers=(), content_type="application/json"):
+        self._set_headers(status_code, len(body), extra_headers, content_type)
+        self.wfile.write(body)
+
+    def _send_json(self, payload, status_code=200):
+        self._send_body(json.dumps(payload).encode("utf-8"), status_code)
+
+    def _read_body(self, limit=None):
+        content_length = int(self.headers.get("Content-Length", 0))
+        if limit is not None and content_length > limit:
+            # The body is left unread, so the connection can't be reused.
+            self.close_connection = True
+            raise ValueError("Request body too large")
+        return self.rfile.read(content_length) if content_length else b""
+
+    def _read_json(self):
+        body = self._read_body() or b"{}"
+        try:
+            return json.loads(body.decode("utf-8") or "{}")
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return {}
+
     def do_OPTIONS(self):
         self._set_headers(200)
 
     def do_GET(self):
-        if self.path == "/feedback":
-            with feedback_lock:
-                payload = dict(latest_feedback)
-            self._set_headers(200)
-            self.wfile.write(json.dumps(payload).encode("utf-8"))
+        url = urlsplit(self.path)
+        if url.path == "/feedback":
+            snapshot = feedback_snapshot
+            headers = (("ETag", snapshot.etag), ("Cache-Control", "no-cache"))
+            if self.headers.get("If-None-Match") == snapshot.etag:
+                self._set_headers(304, extra_headers=headers)
+                return
+            self._send_body(snapshot.body, extra_headers=headers)
             return
 
-        self._set_headers(404)
-        self.wfile.write(json.dumps({"error": "Not found"}).encode("utf-8"))
+        if url.path == "/feedback/stream":
+            self._stream_feedback(parse_qs(url.query))
+            return
 
-    def do_POST(self):
-        if self.path != "/target":
-            self._set_headers(404)
-            self.wfile.write(json.dumps({"error": "Not found"}).encode("utf-8"))
+        if url.path == "/ready":
+            payload = {"ready": ready.is_set(), **startup_state}
+            self._send_json(payload, 200 if ready.is_set() else 503)
             return
 
-        content_length = int(self.headers.get("Content-Length", 0))
-        body = self.rfile.read(content_length or 0) if content_length else b"{}"
+        if url.path == "/signs":
+            with signs_lock:
+                payload = dict(signs_state)
+            self._send_json(payload)
+            return
+
+        if url.path == "/metrics":
+            body = metrics.render().encode("utf-8")
+            self._send_body(body, content_type="text/plain; version=0.0.4")
+            return
+
+        self._send_json({"error": "Not found"}, 404)
+
+    def _stream_feedback(self, query):
+        """Push feedback as Server-Sent Events, resuming from Last-Event-ID or ?since=."""
+        last_sequence = parse_event_id(self.headers.get("Last-Event-ID") or query.get("since", [""])[0])
+
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.flush()
+
         try:
-            payload = json.loads(body.decode("utf-8") or "{}")
-        except json.JSONDecodeError:
-            payload = {}
+            while True:
+                with feedback_changed:
+                    feedback_changed.wait_for(
+                        lambda: latest_feedback["sequence"] > last_sequence, timeout=STREAM_KEEPALIVE
+                    )
+                    events = pending_feedback_events(last_sequence)
+
+                if not events:
+                    self.wfile.write(b": keepalive\n\n")
+                for event in events:
+                    self.wfile.write(f"id: {SERVER_INSTANCE}-{event.sequence}\nevent: feedback\ndata: ".encode("utf-8"))
+                    self.wfile.write(event.body + b"\n\n")
+                    last_sequence = event.sequence
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        match = SESSION_PATH.match(url.path)
+        if match:
+            self._handle_session(match.group(1), match.group(2), parse_qs(url.query))
+            return
 
-        target = str(payload.get("target", "")).strip().upper()
-        if len(target) == 1 and target.isalpha():
+        if url.path == "/signs/reload":
+            self._reload_signs()
+            return
+
+        if url.path == "/classify":
+            self._classify(parse_qs(url.query))
+            return
+
+        if url.path != "/target":
+            self._send_json({"error": "Not found"}, 404)
+            return
+
+        target = parse_target(self._read_json().get("target"))
+        if target:
             global target_letter
             target_letter = target
             with feedback_lock:
-                latest_feedback["target"] = target
+                if latest_feedback["target"] != target:
+                    latest_feedback["target"] = target
+                    record_feedback_event()
 
-        self._set_headers(200)
-        self.wfile.write(json.dumps({"success": True, "target": target_letter}).encode("utf-8"))
+        self._send_json({"success": True, "target": target_letter})
+
+    def _classify(self, query):
+        """Stateless batch classification of client-side landmarks; needs no camera or model."""
+        try:
+            body = self._read_body(limit=MAX_FRAME_BYTES)
+            content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            points, target = decode_landmarks(body, content_type)
+        except ValueError as exc:
+            self._send_json({"error": str(exc)}, 400)
+            return
+
+        target = parse_target(query.get("target", [target])[0])
+        table = LETTER_TABLE
+        results = classify_hands(extract_features(points), points, target, table)
+        self._send_json({
+            "target": target,
+            "signs": table.version,
+            "results": [
+                {
+                    "prediction": result.prediction,
+                    "feedback": result.feedback,
+                    # JSON has no Infinity; hands with unusable features get null margins.
+                    "margins": [[letter, margin if np.isfinite(margin) else None] for letter, margin in result.ranking],
+                }
+                for result in results
+            ],
+        })
+
+    def _reload_signs(self):
+        self._read_body()
+        if ADMIN_TOKEN and self.headers.get("Authorization") != f"Bearer {ADMIN_TOKEN}":
+            self._send_json({"error": "Unauthorized"}, 401)
+            return
+        if not SIGNS_PATH:
+            self._send_json({"error": "No sign definitions file configured (ASL_SIGNS)"}, 409)
+            return
+        try:
+            table = reload_sign_definitions()
+        except ValueError as exc:
+            self._send_json({"error": str(exc), "version": LETTER_TABLE.version}, 400)
+            return
+        self._send_json({"success": True, "version": table.version, "signs": list(table.letters)})
+
+    def _handle_session(self, session_id, action, query):
+        if action == "frame" and not ready.is_set():
+            self.close_connection = True
+            self._send_json({"error": "Not ready", **startup_state}, 503)
+            return
+
+        session = get_session(session_id)
+
+        if action == "target":
+            target = parse_target(self._read_json().get("target"))
+            if target:
+                session.target = target
+            self._send_json({"success": True, "session": session.id, "target": session.target})
+            return
+
+        target = parse_target(query.get("target", [None])[0])
+        if target:
+            session.target = target
+
+        try:
+            width = int(query.get("width", [0])[0]) or None
+            height = int(query.get("height", [0])[0]) or None
+            body = self._read_body(limit=MAX_FRAME_BYTES)
+            content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            payload = get_landmarker_pool().process(session, body, content_type, width, height)
+        except ValueError as exc:
+            self._send_json({"error": str(exc)}, 400)
+            return
+        except Exception as exc:
+            # Detector failures (a crashed detector process, cv2.error) still
+            # get an answer rather than a dropped connection.
+            self._send_json({"error": f"Frame processing failed: {exc}"}, 500)
+            return
+
+        self._send_json(payload)
 
 
 def start_http_server():
-    server = HTTPServer(("0.0.0.0", 5002), FeedbackHandler)
+    server = ThreadingHTTPServer(("0.0.0.0", HTTP_PORT), FeedbackHandler)
     server.serve_forever()
 
 
-def main():
-    if USE_TASKS_API:
-        ensure_hand_landmarker_model()
-        base_options = mp_tasks.BaseOptions(model_asset_path=MODEL_PATH)
-        options = mp_vision.HandLandmarkerOptions(
-            base_options=base_options,
-            running_mode=mp_vision.RunningMode.VIDEO,
-            num_hands=1,
-            min_hand_detection_confidence=0.1,
-            min_hand_presence_confidence=0.1,
-            min_tracking_confidence=0.1,
-        )
-        hand_landmarker = mp_vision.HandLandmarker.create_from_options(options)
+def classify_features(features, target):
+    result = classify_batch(features, target)[0]
+    return result.prediction, result.feedback
 
-    server_thread = threading.Thread(target=start_http_server, daemon=True)
-    server_thread.start()
 
-    cap = cv2.VideoCapture(0)
-    angles = None
-    prediction = "Waiting..."
-    interval = 1
-    last_update_time = 0.0
+attempt_log = None
+lexicon = None
 
-    if USE_TASKS_API:
-        frame_index = 0
-        while cap.isOpened():
-            ret, frame = cap.read()
+
+def load_lexicon(path=None):
+    global lexicon
+    path = path or LEXICON_PATH
+    if path:
+        lexicon = LexiconTrie.load(path)
+    return lexicon
+
+
+def open_attempt_log(path=None):
+    global attempt_log
+    path = path or ATTEMPT_LOG_PATH
+    if path and attempt_log is None:
+        attempt_log = AttemptLog(path, ATTEMPT_LOG_MAX_BYTES, ATTEMPT_LOG_BACKUPS, ATTEMPT_QUEUE_SIZE)
+    return attempt_log
+
+
+def record_attempt(learner, target, hands, timestamp):
+    """Queue one classification for the attempt log; never waits on disk."""
+    if attempt_log is None:
+        return
+    attempt_log.submit({
+        "t": timestamp,
+        "learner": learner,
+        "target": target,
+        "signs": LETTER_TABLE.version,
+        "hands": hands,
+    })
+
+
+def hand_result(detection, prediction, feedback_msgs):
+    return {
+        "handedness": detection.handedness,
+        "confidence": round(float(detection.confidence), 3),
+        "prediction": prediction,
+        "feedback": feedback_msgs,
+    }
+
+
+def primary_hand(hands, target):
+    """The hand reported at the top level: one signing the target, else the most confident."""
+    for hand in hands:
+        if hand["prediction"] == target:
+            return hand
+    return max(hands, key=lambda hand: hand["confidence"])
+
+
+def publish_spelling(spelling):
+    with feedback_lock:
+        locked_at = time.perf_counter()
+        latest_feedback["spelling"] = spelling
+        record_feedback_event()
+        metrics.observe("feedback_lock", time.perf_counter() - locked_at)
+
+
+def hand_signature(hands):
+    """The parts of hands that decide whether feedback changed.
+
+    Detector confidence is left out: it moves on every frame, so comparing it
+    would publish a new event for every frame.
+    """
+    return [(hand["handedness"], hand["prediction"], hand["feedback"]) for hand in hands]
+
+
+def publish_feedback(prediction, feedback_msgs, timestamp, hands=()):
+    """Update latest_feedback; returns True if it changed and an event was published."""
+    hands = list(hands)
+    with feedback_lock:
+        locked_at = time.perf_counter()
+        changed = (
+            latest_feedback["prediction"] != prediction
+            or latest_feedback["feedback"] != feedback_msgs
+            or latest_feedback["target"] != target_letter
+            or hand_signature(latest_feedback["hands"]) != hand_signature(hands)
+        )
+        latest_feedback["prediction"] = prediction
+        latest_feedback["feedback"] = feedback_msgs
+        latest_feedback["timestamp"] = timestamp
+        latest_feedback["target"] = target_letter
+        latest_feedback["hands"] = hands
+        if changed:
+            record_feedback_event()
+        metrics.observe("feedback_lock", time.perf_counter() - locked_at)
+    return changed
+
+
+class FrameCapture:
+    """Reads camera frames on a background thread, keeping only the latest one.
+
+    Frames the consumer hasn't picked up by the time a newer one arrives are
+    dropped, so a slow detector always works on the freshest frame instead of
+    draining a backlog from the camera buffer.
+
+    Frames are decoded into three buffers that are reused for the whole run
+    (one being written, one latest, one held by the consumer), so a frame
+    returned by read() stays valid until the next call to read().
+
+    Setting interval makes it decode at most one frame per interval seconds;
+    frames in between are only grabbed, which keeps the camera buffer fresh
+    without paying for decoding.
+    """
+
+    def __init__(self, source=0):
+        self.cap = cv2.VideoCapture(source)
+        self.cond = threading.Condition()
+        self.buffers = [None, None, None]
+        self.write_slot = 0
+        self.latest_slot = None
+        self.read_slot = None
+        self.timestamp = 0.0
+        self.interval = 0.0
+        self.running = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.running = True
+        self.thread.start()
+        return self
+
+    def _run(self):
+        while self.running and self.cap.isOpened():
+            if self.interval and time.monotonic() - self.timestamp < self.interval:
+                if not self.cap.grab():
+                    time.sleep(0.005)
+                continue
+
+            buffer = self.buffers[self.write_slot]
+            read_start = time.perf_counter()
+            ret, frame = self.cap.read(buffer) if buffer is not None else self.cap.read()
             if not ret:
+                time.sleep(0.005)
                 continue
 
-            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            mp_image = Image(image_format=ImageFormat.SRGB, data=image)
-            timestamp_ms = frame_index * 33
-            frame_index += 1
-            result = hand_landmarker.detect_for_video(mp_image, timestamp_ms)
-            image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-
-            if result.hand_landmarks:
-                hand_landmarks = result.hand_landmarks[0]
-                mp_drawing.draw_landmarks(
-                    image,
-                    hand_landmarks,
-                    mp_vision.HandLandmarksConnections,
-                    mp_drawing_styles.get_default_hand_landmarks_style(),
-                    mp_drawing_styles.get_default_hand_connections_style(),
-                )
+            now = time.monotonic()
+            metrics.observe("capture", time.perf_counter() - read_start)
+            metrics.count("captured")
+            self.buffers[self.write_slot] = frame
+            with self.cond:
+                if self.latest_slot is not None:
+                    metrics.count("dropped")
+                    next_slot = self.latest_slot
+                else:
+                    next_slot = ({0, 1, 2} - {self.write_slot, self.read_slot}).pop()
+                self.latest_slot = self.write_slot
+                self.write_slot = next_slot
+                self.timestamp = now
+                self.cond.notify()
+
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+
+    def read(self, timeout=1.0):
+        """Return (frame, monotonic capture time), or (None, None) on timeout."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.latest_slot is not None or not self.running, timeout)
+            if self.latest_slot is None:
+                return None, None
+            self.read_slot = self.latest_slot
+            self.latest_slot = None
+            return self.buffers[self.read_slot], self.timestamp
+
+    def is_running(self):
+        return self.running
+
+    def stop(self):
+        self.running = False
+        if self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+        self.cap.release()
+
+
+def convert_to_rgb(frame, out=None):
+    """BGR->RGB into out, allocating it only when the frame size changes."""
+    if out is None or out.shape != frame.shape:
+        out = np.empty_like(frame)
+    cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=out)
+    return out
+
+
+def convert_into(frame, frame_buffer, fallback):
+    """convert_to_rgb into frame_buffer(frame.shape) if it offers an array, else into fallback.
+
+    frame_buffer is a backend's frame_buffer method or None. Returns
+    (image, fallback); fallback is only (re)allocated when it is used.
+    """
+    out = frame_buffer(frame.shape) if frame_buffer is not None else None
+    if out is not None:
+        return convert_to_rgb(frame, out), fallback
+    fallback = convert_to_rgb(frame, fallback)
+    return fallback, fallback
+
+
+def map_landmarks(landmarks, transform):
+    """Map landmarks normalized to a crop back to full-frame coordinates, in place."""
+    left, top, width, height = transform
+    for lm in landmarks:
+        lm.x = left + lm.x * width
+        lm.y = top + lm.y * height
+        lm.z = lm.z * width
+
+
+def map_points(points, transform):
+    """Vectorized map_landmarks for a (..., 21, 3) array, in place."""
+    left, top, width, height = transform
+    points[..., 0] = left + points[..., 0] * width
+    points[..., 1] = top + points[..., 1] * height
+    points[..., 2] *= width
+    return points
+
+
+class HandROI:
+    """Crops frames around the tracked hand and adapts the inference resolution.
+
+    The crop is a padded square around the previous frame's landmarks and only
+    moves once the hand nears its edge, so consecutive crops line up for the
+    landmarker's own tracking. When no hand is found the next frame is searched
+    in full. Frames are downscaled so their long side fits the current entry
+    of INFERENCE_SIZES, which steps down while the loop is over budget and back
+    up when there is headroom.
+    """
+
+    def __init__(self):
+        self.box = None
+        self.level = 0
+        self.frame_time = None
+        self.cooldown = 0
+        self.scaled = None
+        self.rgb = None
+
+    def prepare(self, frame, frame_buffer=None):
+        """Return (rgb inference image, transform) for one BGR frame.
+
+        The image is written into frame_buffer(shape) when the backend offers one.
+        """
+        h, w = frame.shape[:2]
+        x0, y0, x1, y1 = self.box or (0, 0, w, h)
+        region = frame[y0:y1, x0:x1]
+
+        scale = INFERENCE_SIZES[self.level] / max(region.shape[:2])
+        if scale < 1.0:
+            size = (max(1, round(region.shape[1] * scale)), max(1, round(region.shape[0] * scale)))
+            if self.scaled is None or self.scaled.shape[1::-1] != size:
+                self.scaled = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            cv2.resize(region, size, dst=self.scaled, interpolation=cv2.INTER_AREA)
+            region = self.scaled
+
+        image, self.rgb = convert_into(region, frame_buffer, self.rgb)
+        return image, (x0 / w, y0 / h, (x1 - x0) / w, (y1 - y0) / h)
+
+    def update(self, points, frame_shape):
+        """Move the crop to follow full-frame normalized (..., 21, 3) points, or drop it if None.
+
+        With several hands the crop covers all of them.
+        """
+        if points is None:
+            self.box = None
+            return
 
-                current_time = time.time()
-                if current_time - last_update_time >= interval:
-                    lm = hand_landmarks
-                    index_angle = get_angle(
-                        np.array([lm[5].x, lm[5].y, lm[5].z]),
-                        np.array([lm[6].x, lm[6].y, lm[6].z]),
-                        np.array([lm[8].x, lm[8].y, lm[8].z]),
-                    )
+        h, w = frame_shape[:2]
+        xs = points[..., 0] * w
+        ys = points[..., 1] * h
+        left, right, top, bottom = xs.min(), xs.max(), ys.min(), ys.max()
+
+        if self.box is not None:
+            x0, y0, x1, y1 = self.box
+            margin = ROI_MARGIN * (x1 - x0)
+            if (
+                left >= x0 + margin and right <= x1 - margin
+                and top >= y0 + margin and bottom <= y1 - margin
+                and max(right - left, bottom - top) * (1 + ROI_PADDING) >= 0.5 * (x1 - x0)
+            ):
+                return
+
+        side = max(right - left, bottom - top) * (1 + 2 * ROI_PADDING)
+        side = int(min(max(side, 64), w, h))
+        cx = (left + right) / 2
+        cy = (top + bottom) / 2
+        x0 = int(min(max(cx - side / 2, 0), w - side))
+        y0 = int(min(max(cy - side / 2, 0), h - side))
+        self.box = (x0, y0, x0 + side, y0 + side)
+
+    def adapt(self, loop_seconds):
+        """Feed one loop time; steps the inference size down or up as needed."""
+        if self.frame_time is None:
+            self.frame_time = loop_seconds
+        self.frame_time += 0.1 * (loop_seconds - self.frame_time)
+
+        if self.cooldown:
+            self.cooldown -= 1
+            return
+        if self.frame_time > ROI_FRAME_BUDGET * 1.1 and self.level < len(INFERENCE_SIZES) - 1:
+            self.level += 1
+            self.cooldown = ROI_ADAPT_COOLDOWN
+        elif self.frame_time < ROI_FRAME_BUDGET * 0.6 and self.level > 0:
+            self.level -= 1
+            self.cooldown = ROI_ADAPT_COOLDOWN
+
+
+class MotionGate:
+    """Caches one hand's last stable classification while the hand holds still.
+
+    New landmarks are compared with the ones last classified (not the previous
+    frame, so slow drift still adds up); the cache is also dropped when the
+    target or sign table changes. Unstable (None) predictions are never
+    reused, so the temporal vote keeps advancing until it settles.
+    """
+
+    def __init__(self, tolerance=MOTION_TOLERANCE):
+        self.tolerance = tolerance
+        self.points = np.empty((NUM_LANDMARKS, 2), dtype=np.float32)
+        self.key = None
+        self.result = None
+
+    def lookup(self, points, key):
+        """The cached (prediction, feedback) if points are within tolerance, else None."""
+        if self.result is None or key != self.key:
+            return None
+        scale = np.hypot(*(self.points[9] - self.points[0]))
+        moved = np.abs(points[:, :2] - self.points).max()
+        return self.result if moved <= self.tolerance * scale else None
+
+    def store(self, points, key, result):
+        self.points[:] = points[:, :2]
+        self.key = key
+        self.result = result if result[0] is not None and self.tolerance > 0 else None
+
+
+class HandPipeline:
+    """Turns detector results into published predictions.
+
+    Each hand keeps its own TemporalClassifier, keyed by handedness; features
+    for all hands in a frame are extracted in one batch. Only the first hand
+    is recorded.
+
+    After IDLE_AFTER seconds without a hand the pipeline goes idle: prepare()
+    hands out small full-frame images for presence checks until a hand is
+    seen again. "No hand" is published once when the hand leaves, not on
+    every empty frame.
+
+    Hands that haven't moved since they were last classified skip feature
+    extraction and classification through their MotionGate.
+
+    The primary hand's stable predictions also drive a FingerspellingDecoder,
+    whose word, completions and transcript are published as "spelling".
+    """
+
+    def __init__(self, recorder=None, roi=None):
+        self.points = np.empty((NUM_HANDS, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.temporal = {}
+        self.gates = {}
+        self.recorder = recorder
+        self.roi = roi
+        self.frame_shape = None
+        # Most recent (detections, transform), for drawing the preview.
+        self.latest = ((), None)
+        self.hand_present = None
+        self.last_hand = time.monotonic()
+        self.idle = False
+        self.presence_scaled = None
+        self.presence_rgb = None
+        self.rgb = None
+        self.speller = FingerspellingDecoder(lexicon)
+
+    def prepare(self, frame, frame_buffer=None):
+        """Return (rgb inference image, crop transform or None) for a BGR frame.
+
+        frame_buffer is the backend's frame_buffer method, if the image should
+        be written straight into memory the backend reads without copying.
+        """
+        self.frame_shape = frame.shape
+        if self.idle:
+            return self._presence_image(frame, frame_buffer), None
+        if self.roi is None:
+            image, self.rgb = convert_into(frame, frame_buffer, self.rgb)
+            return image, None
+        return self.roi.prepare(frame, frame_buffer)
+
+    def _presence_image(self, frame, frame_buffer=None):
+        h, w = frame.shape[:2]
+        scale = IDLE_INFERENCE_SIZE / max(h, w)
+        if scale < 1.0:
+            size = (max(1, round(w * scale)), max(1, round(h * scale)))
+            if self.presence_scaled is None or self.presence_scaled.shape[1::-1] != size:
+                self.presence_scaled = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            cv2.resize(frame, size, dst=self.presence_scaled, interpolation=cv2.INTER_AREA)
+            frame = self.presence_scaled
+        image, self.presence_rgb = convert_into(frame, frame_buffer, self.presence_rgb)
+        return image
+
+    def _update_presence(self, present):
+        now = time.monotonic()
+        if present:
+            self.last_hand = now
+        idle = not present and IDLE_AFTER > 0 and now - self.last_hand >= IDLE_AFTER
+        if idle:
+            metrics.count("idle")
+        self.idle = metrics.idle = idle
+
+    def _hand_state(self, detections):
+        """(TemporalClassifier, MotionGate) per hand; hands that left the frame are dropped."""
+        keys = []
+        for detection in detections:
+            key = detection.handedness
+            keys.append(key if key not in keys else f"{key}{len(keys)}")
+        self.temporal = {key: self.temporal.get(key) or TemporalClassifier() for key in keys}
+        self.gates = {key: self.gates.get(key) or MotionGate() for key in keys}
+        return [(self.temporal[key], self.gates[key]) for key in keys]
+
+    def handle(self, detections, context=None):
+        """DetectorBackend result callback; context is (crop transform, loop start)."""
+        transform, started = context or (None, None)
+        current_time = time.time()
+        metrics.frame_processed()
+        detections = detections[:NUM_HANDS]
+        self._update_presence(bool(detections))
+        points = self.points[:len(detections)]
+        for i, detection in enumerate(detections):
+            points[i] = detection.points
+        if transform is not None:
+            map_points(points, transform)
+        self.latest = (detections, transform)
+        if self.roi is not None:
+            self.roi.update(points if detections else None, self.frame_shape)
+        if self.recorder is not None:
+            self.recorder.write(current_time, points[0] if detections else None, target_letter)
+
+        if not detections:
+            if self.hand_present is not False:
+                self.temporal = {}
+                self.gates = {}
+                publish_feedback("No hand", [], current_time)
+            self.hand_present = False
+            spelled = self.speller.feed("No hand", current_time)
+        else:
+            self.hand_present = True
+            metrics.count("with_hand")
+            state = self._hand_state(detections)
+            key = (target_letter, LETTER_TABLE.version)
+            results = [gate.lookup(points[i], key) for i, (_, gate) in enumerate(state)]
+            stale = [i for i, result in enumerate(results) if result is None]
+            metrics.count("skipped", len(results) - len(stale))
+            if stale:
+                t0 = time.perf_counter()
+                features = extract_features(points[stale])
+                t1 = time.perf_counter()
+                for row, i in enumerate(stale):
+                    temporal, gate = state[i]
+                    results[i] = temporal.push(features[row], points[i], target_letter)
+                    gate.store(points[i], key, results[i])
+                metrics.observe("features", t1 - t0)
+                metrics.observe("classify", time.perf_counter() - t1)
+            hands = [
+                hand_result(detection, prediction, feedback_msgs)
+                for detection, (prediction, feedback_msgs) in zip(detections, results)
+                if prediction is not None
+            ]
+            primary = None
+            if hands:
+                metrics.count("classified")
+                primary = primary_hand(hands, target_letter)
+                # Log attempts as the published classification changes, not
+                # once per frame of a held pose.
+                if publish_feedback(primary["prediction"], primary["feedback"], current_time, hands):
+                    record_attempt("camera", target_letter, hands, current_time)
+            spelled = self.speller.feed(primary and primary["prediction"], current_time)
+        if spelled:
+            publish_spelling(self.speller.state())
+
+        if self.roi is not None and started is not None and not self.idle:
+            self.roi.adapt(time.perf_counter() - started)
+
+
+def run_camera_loop(backend, pipeline, capture):
+    # Live-stream results can be drawn on several frames; map them to frame
+    # coordinates only the first time.
+    drawn = None
+    while capture.is_running():
+        frame, captured_at = capture.read()
+        if frame is None:
+            continue
+        loop_start = time.perf_counter()
 
-                    middle_angle = get_angle(
-                        np.array([lm[9].x, lm[9].y, lm[9].z]),
-                        np.array([lm[10].x, lm[10].y, lm[10].z]),
-                        np.array([lm[12].x, lm[12].y, lm[12].z]),
-                    )
+        # The final RGB image (full frame, ROI crop or idle presence image) is
+        # written straight into the backend's buffer when it offers one (a
+        # shared-memory slot); otherwise into the pipeline's own.
+        image, transform = pipeline.prepare(frame, backend.frame_buffer)
+        metrics.observe("convert", time.perf_counter() - loop_start)
+        backend.submit(image, int(captured_at * 1000), (transform, loop_start))
+        capture.interval = 1.0 / IDLE_FPS if pipeline.idle and IDLE_FPS > 0 else 0.0
 
-                    ring_angle = get_angle(
-                        np.array([lm[13].x, lm[13].y, lm[13].z]),
-                        np.array([lm[14].x, lm[14].y, lm[14].z]),
-                        np.array([lm[16].x, lm[16].y, lm[16].z]),
-                    )
+        if HEADLESS:
+            continue
 
-                    pinky_angle = get_angle(
-                        np.array([lm[17].x, lm[17].y, lm[17].z]),
-                        np.array([lm[18].x, lm[18].y, lm[18].z]),
-                        np.array([lm[20].x, lm[20].y, lm[20].z]),
-                    )
+        draw_start = time.perf_counter()
+        detections, transform = pipeline.latest
+        for detection in detections:
+            if detection.landmarks is not None:
+                backend.draw(frame, detection, transform if detections is not drawn else None)
+        drawn = detections
+        cv2.imshow("ASL Stable Sampling", frame)
+        metrics.observe("draw", time.perf_counter() - draw_start)
+        if cv2.waitKey(10) & 0xFF == ord("q"):
+            break
+
+
+def run_frameless_loop(backend, fps=SYNTHETIC_FPS):
+    """Drive a camera-less backend, optionally paced to fps."""
+    period = 1.0 / fps if fps > 0 else 0.0
+    next_frame = time.perf_counter()
+    while True:
+        loop_start = time.perf_counter()
+        backend.submit(None, int(time.monotonic() * 1000), (None, loop_start))
+        if period:
+            next_frame += period
+            time.sleep(max(0.0, next_frame - time.perf_counter()))
 
-                    thumb_tip = np.array([lm[4].x, lm[4].y, lm[4].z])
-                    index_tip = np.array([lm[8].x, lm[8].y, lm[8].z])
-                    index_mcp = np.array([lm[5].x, lm[5].y, lm[5].z])
-                    middle_tip = np.array([lm[12].x, lm[12].y, lm[12].z])
-                    pinky_tip = np.array([lm[20].x, lm[20].y, lm[20].z])
-                    ring_tip = np.array([lm[16].x, lm[16].y, lm[16].z])
-                    ti_dist = get_distance(thumb_tip, index_tip)
-                    tm_dist = get_distance(thumb_tip, middle_tip)
-                    tr_dist = get_distance(thumb_tip, ring_tip)
-                    im_dist = get_distance(middle_tip, index_tip)
-                    tp_dist = get_distance(thumb_tip, pinky_tip)
-                    thumb_dist = get_distance(thumb_tip, index_mcp)
-                    thumb_dx = lm[4].x - lm[5].x
-                    index_dx = lm[8].x - lm[5].x
-                    index_dy = lm[8].y - lm[5].y
-
-                    angles = {
-                        "index": int(index_angle),
-                        "middle": int(middle_angle),
-                        "ring": int(ring_angle),
-                        "pinky": int(pinky_angle),
-                        "thumb": round(thumb_dist, 3),
-                        "thumb_dx": round(thumb_dx, 3),
-                        "im_dist": round(im_dist, 3),
-                        "ti_dist": round(ti_dist, 3),
-                        "tm_dist": round(tm_dist, 3),
-                        "tp_dist": round(tp_dist, 3),
-                        "tr_dist": round(tr_dist, 3),
-                    }
-
-                    prediction = "Unknown"
-
-                    for letter, ranges in letter_ranges.items():
-                        if all(
-                            in_range(angles[k], *ranges[k])
-                            for k in (ranges.keys() & angles.keys())
-                        ):
-                            if "dir" in ranges:
-                                if ranges["dir"] == "horizontal" and abs(index_dx) < abs(index_dy):
-                                    continue
-                            prediction = letter
-                            break
-
-                    feedback_msgs = []
-                    feedback_items = generate_feedback(target_letter, angles)
-                    for param, kind in feedback_items:
-                        msg = FEEDBACK_MAP.get(param, {}).get(kind)
-                        if msg:
-                            feedback_msgs.append(msg)
-
-                    with feedback_lock:
-                        latest_feedback["prediction"] = prediction
-                        latest_feedback["feedback"] = feedback_msgs
-                        latest_feedback["timestamp"] = current_time
-                        latest_feedback["target"] = target_letter
-
-                    last_update_time = current_time
-            else:
-                current_time = time.time()
-                with feedback_lock:
-                    latest_feedback["prediction"] = "No hand"
-                    latest_feedback["feedback"] = []
-                    latest_feedback["timestamp"] = current_time
-                    latest_feedback["target"] = target_letter
-
-            cv2.imshow("ASL Stable Sampling", image)
-            if cv2.waitKey(10) & 0xFF == ord("q"):
-                break
-    else:
-        with mp_hands.Hands(
-            min_detection_confidence=0.8,
-            min_tracking_confidence=0.5,
-            max_num_hands=1,
-        ) as hands:
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    continue
-
-                image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                image.flags.writeable = False
-                results = hands.process(image)
-                image.flags.writeable = True
-                image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-
-                if results.multi_hand_landmarks:
-                    hand = results.multi_hand_landmarks[0]
-                    mp_drawing.draw_landmarks(
-                        image,
-                        hand,
-                        mp_hands.HAND_CONNECTIONS,
-                        mp_drawing.DrawingSpec(color=(25, 25, 255), circle_radius=2, thickness=2),
-                        mp_drawing.DrawingSpec(color=(0, 255, 0)),
-                    )
 
-                    current_time = time.time()
-                    if current_time - last_update_time >= interval:
-                        lm = hand.landmark
-
-                        index_angle = get_angle(
-                            np.array([lm[5].x, lm[5].y, lm[5].z]),
-                            np.array([lm[6].x, lm[6].y, lm[6].z]),
-                            np.array([lm[8].x, lm[8].y, lm[8].z]),
-                        )
-
-                        middle_angle = get_angle(
-                            np.array([lm[9].x, lm[9].y, lm[9].z]),
-                            np.array([lm[10].x, lm[10].y, lm[10].z]),
-                            np.array([lm[12].x, lm[12].y, lm[12].z]),
-                        )
-
-                        ring_angle = get_angle(
-                            np.array([lm[13].x, lm[13].y, lm[13].z]),
-                            np.array([lm[14].x, lm[14].y, lm[14].z]),
-                            np.array([lm[16].x, lm[16].y, lm[16].z]),
-                        )
-
-                        pinky_angle = get_angle(
-                            np.array([lm[17].x, lm[17].y, lm[17].z]),
-                            np.array([lm[18].x, lm[18].y, lm[18].z]),
-                            np.array([lm[20].x, lm[20].y, lm[20].z]),
-                        )
-
-                        thumb_tip = np.array([lm[4].x, lm[4].y, lm[4].z])
-                        index_tip = np.array([lm[8].x, lm[8].y, lm[8].z])
-                        index_mcp = np.array([lm[5].x, lm[5].y, lm[5].z])
-                        middle_tip = np.array([lm[12].x, lm[12].y, lm[12].z])
-                        pinky_tip = np.array([lm[20].x, lm[20].y, lm[20].z])
-                        ring_tip = np.array([lm[16].x, lm[16].y, lm[16].z])
-                        ti_dist = get_distance(thumb_tip, index_tip)
-                        tm_dist = get_distance(thumb_tip, middle_tip)
-                        tr_dist = get_distance(thumb_tip, ring_tip)
-                        im_dist = get_distance(middle_tip, index_tip)
-                        tp_dist = get_distance(thumb_tip, pinky_tip)
-                        thumb_dist = get_distance(thumb_tip, index_mcp)
-                        thumb_dx = lm[4].x - lm[5].x
-                        index_dx = lm[8].x - lm[5].x
-                        index_dy = lm[8].y - lm[5].y
-
-                        angles = {
-                            "index": int(index_angle),
-                            "middle": int(middle_angle),
-                            "ring": int(ring_angle),
-                            "pinky": int(pinky_angle),
-                            "thumb": round(thumb_dist, 3),
-                            "thumb_dx": round(thumb_dx, 3),
-                            "im_dist": round(im_dist, 3),
-                            "ti_dist": round(ti_dist, 3),
-                            "tm_dist": round(tm_dist, 3),
-                            "tp_dist": round(tp_dist, 3),
-                            "tr_dist": round(tr_dist, 3),
-                        }
-
-                        prediction = "Unknown"
-
-                        for letter, ranges in letter_ranges.items():
-                            if all(
-                                in_range(angles[k], *ranges[k])
-                                for k in (ranges.keys() & angles.keys())
-                            ):
-                                if "dir" in ranges:
-                                    if ranges["dir"] == "horizontal" and abs(index_dx) < abs(index_dy):
-                                        continue
-                                prediction = letter
-                                break
-
-                        feedback_msgs = []
-                        feedback_items = generate_feedback(target_letter, angles)
-                        for param, kind in feedback_items:
-                            msg = FEEDBACK_MAP.get(param, {}).get(kind)
-                            if msg:
-                                feedback_msgs.append(msg)
-
-                        with feedback_lock:
-                            latest_feedback["prediction"] = prediction
-                            latest_feedback["feedback"] = feedback_msgs
-                            latest_feedback["timestamp"] = current_time
-                            latest_feedback["target"] = target_letter
-
-                        last_update_time = current_time
-
-                cv2.imshow("ASL Stable Sampling", image)
-                if cv2.waitKey(10) & 0xFF == ord("q"):
-                    break
-
-    cap.release()
-    cv2.destroyAllWindows()
+def main():
+    server_thread = threading.Thread(target=start_http_server, daemon=True)
+    server_thread.start()
+
+    try:
+        set_startup_stage("loading")
+        open_attempt_log()
+        load_exemplars()
+        load_lexicon()
+        if SIGNS_PATH:
+            reload_sign_definitions()
+            threading.Thread(target=watch_sign_definitions, name="signs-watcher", daemon=True).start()
+        if CAMERA_SOURCE.lower() == "none" and BACKEND == "auto":
+            load_vision()
+            set_startup_stage("warming up")
+            get_landmarker_pool().warm_up()
+            set_startup_stage("ready")
+            server_thread.join()
+            return
+
+        backend = create_backend(BACKEND)
+        if isinstance(backend, ProcessBackend):
+            # Session frames share the camera's detector processes and ring.
+            get_landmarker_pool(backend)
+        recorder = RecordingWriter(RECORD_PATH) if RECORD_PATH else None
+        roi = HandROI() if ROI_TRACKING and backend.needs_camera else None
+        pipeline = HandPipeline(recorder=recorder, roi=roi)
+        backend.start(pipeline.handle)
+
+        set_startup_stage("warming up")
+        backend.warm_up()
+
+        capture = None
+        if backend.needs_camera:
+            source = int(CAMERA_SOURCE) if CAMERA_SOURCE.isdigit() else CAMERA_SOURCE
+            capture = FrameCapture(source).start()
+    except Exception as exc:
+        set_startup_stage("failed", exc)
+        raise
+
+    set_startup_stage("ready")
+    try:
+        if capture is not None:
+            run_camera_loop(backend, pipeline, capture)
+        else:
+            run_frameless_loop(backend)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        backend.close()
+        if capture is not None:
+            capture.stop()
+        if recorder is not None:
+            recorder.close()
+        if attempt_log is not None:
+            attempt_log.close()
+        if capture is not None and not HEADLESS:
+            cv2.destroyAllWindows()
 
 
 if __name__ == "__main__":
     main()
-